@@ -0,0 +1,22 @@
+"""
+初期局面からの定石ファイルを作るツール
+例: python samples/build_book.py book.bin --plies 6 --search-depth 4
+"""
+import sys, os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import argparse, time, othello_py
+
+def main():
+    p = argparse.ArgumentParser(__doc__)
+    p.add_argument("path")
+    p.add_argument("--plies", type=int, default=6)
+    p.add_argument("--search-depth", type=int, default=4)
+    args = p.parse_args()
+
+    start = time.time()
+    entries = othello_py.build_book(args.path, args.plies, args.search_depth)
+    print(f"{entries} positions written to {args.path} ({time.time() - start:.1f}s)")
+
+if __name__=="__main__":
+    main()
@@ -1,42 +1,63 @@
-import sys, os, copy
+import sys, os, time
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
 
-from othello_py import play_game, Player
-from othello_py.field import OthelloField
-from othello_py.protocol import Command
+from othello_py import play_game
+from othello_py.batch import HAS_NUMPY, BoardBatch
+from othello_py.compact import CompactField
+from othello_py.endgame import ENDGAME_EMPTIES
+from othello_py.book import OpeningBook
+from othello_py.infoset import InfoSet
+from othello_py.infoset_player import InfoSetPlayer
+from othello_py.parallel import ParallelSearch, pack_info_set, unpack_info_set
+from othello_py.transposition import Bound, TranspositionTable, bound_for
+from othello_py.zobrist import node_key
 
 Move = tuple[int, int]
-BoardState = OthelloField
-
-class InfoSet:
-    """
-    情報セットに関するクラス
-    矛盾がなく、その状態の可能性がある世界を集合で管理する    
-    """
-    def __init__(self, worlds: list[BoardState]):
-        self.worlds = worlds
-        
-
-    def possible_moves(self, player_id: int) -> set[Move]:
-        '''
-        すべての世界において、指定プレイヤーが打てる合法手を取得する
-        '''
-        if not self.worlds:
-            return set()
-        common = set(self.worlds[0].get_legal_moves(player_id))
-        for world in self.worlds[1:]:
-            common &= set(world.get_legal_moves(player_id))
-        return common
-    
-    def union_moves(self, player_id: int) -> set[Move]:
-        '''
-        一つの世界において、指定プレイヤーが打てる合法手を取得する
-        '''
-        moves = set()
-        for world in self.worlds:
-            moves |= set(world.get_legal_moves(player_id))
-        return moves
-    
+BoardState = CompactField # 情報集合は大量の世界を持つので省メモリの盤面を使う (OthelloField, BitboardField に差し替え可能)
+BATCH_MIN_WORLDS = 32 # この数以上の世界があれば BoardBatch で評価する (numpy がある場合)
+
+class SearchTimeout(Exception):
+    """
+    探索の制限時間を過ぎたときに送出する例外
+    """
+
+def check_deadline(deadline: float | None) -> None:
+    """
+    制限時間 (time.monotonic() の値) を過ぎていれば SearchTimeout を送出する関数
+    """
+    if deadline is not None and time.monotonic() > deadline:
+        raise SearchTimeout
+
+def push_move(info: InfoSet, move: Move, player_id: int) -> tuple[InfoSet, list[BoardState]]:
+    """
+    着手が合法な世界にだけ push() で着手を適用する関数
+    盤面はコピーせずにその場で書き換えるので、探索後は pop_move() で戻すこと
+    着手後に同じ盤面になった世界は、子の情報集合では多重度を足して1つにまとまる
+    戻り値: (着手後の情報集合, 着手を適用した世界のリスト)
+    """
+    return push_worlds([(world, count) for world, count in info.items() if move in world.get_legal_moves(player_id)], move, player_id)
+
+def push_worlds(entries: list[tuple[BoardState, int]], move: Move, player_id: int) -> tuple[InfoSet, list[BoardState]]:
+    """
+    着手が合法だと分かっている (世界, 多重度) のリストに push() で着手を適用する関数
+    InfoSet.partition() で分けた世界をそのまま渡すと、合法手の判定をやり直さずに済む
+    戻り値: (着手後の情報集合, 着手を適用した世界のリスト)
+    """
+    next_info = InfoSet()
+    pushed = []
+    for world, count in entries:
+        world.push(move, player_id)
+        pushed.append(world)
+        next_info.add(world, count)
+    return next_info, pushed
+
+def pop_move(worlds: list[BoardState]) -> None:
+    """
+    push_move() で適用した着手を取り消す関数
+    """
+    for world in worlds:
+        world.pop()
+
 def evaluate_world(state: BoardState, player_id: int, turn: int) -> float:
     """
     盤面の評価関数
@@ -55,275 +76,341 @@ def evaluate_world(state: BoardState, player_id: int, turn: int) -> float:
         return diff
     
 
+def evaluate_batch(info: InfoSet, player_id: int, turn: int) -> float:
+    """
+    evaluate_world と同じ評価を、BoardBatch で全世界まとめて計算して多重度で重み付き平均する関数
+    """
+    batch = BoardBatch(info.worlds)
+    weights = info.counts
+    diff = batch.piece_diff(player_id)
+    if turn >= 30:
+        values = diff
+    else:
+        early = max(0, 16 - turn)
+        late = max(0, turn - 16)
+        values = (1+0.5*late)*diff + 10 * batch.corner_diff(player_id) + 5 * batch.edge_diff(player_id) \
+            + 2 * (1 + 0.2*early) * batch.mobility_diff(player_id)
+    return float(values @ weights) / sum(weights)
+
 def evaluate(info: InfoSet, player_id: int, turn: int) -> float:
+    """
+    情報集合の評価関数
+    各世界の評価値を多重度で重み付けして平均する
+    """
     if not info.worlds:
         return 0
-    return sum(evaluate_world(world, player_id, turn) for world in info.worlds) / len(info.worlds)
+    if HAS_NUMPY and len(info.worlds) >= BATCH_MIN_WORLDS: # 世界が多いときはまとめてベクトル演算で評価する
+        return evaluate_batch(info, player_id, turn)
+    return sum(evaluate_world(world, player_id, turn) * count for world, count in info.items()) / info.total
+
+def probe_tt(tt: TranspositionTable | None, info: InfoSet, depth: int, player_id: int, turn: int, alpha: float, beta: float) -> tuple[int | None, float | None, float, float]:
+    """
+    置換表を引いて、探索を打ち切れるか判定する関数
+    戻り値: (ノードのキー, 打ち切れる場合の評価値 または None, 更新後の alpha, 更新後の beta)
+    """
+    if tt is None:
+        return None, None, alpha, beta
+    key = node_key(info.key(), player_id, turn)
+    hit, alpha, beta = tt.cutoff(key, depth, alpha, beta)
+    return key, hit, alpha, beta
 
-def max_value(info: InfoSet, depth: int, player_id: int, turn: int, alpha: float = float('-inf'), beta: float = float('inf')) -> float:
+def order_moves(tt: TranspositionTable | None, key: int | None, moves: set[Move]) -> list[Move]:
+    """
+    置換表に最善手があれば、それを先頭にして着手を並べる関数
+    """
+    entry = tt.probe(key) if tt is not None else None
+    if entry is None or entry.move not in moves:
+        return list(moves)
+    return [entry.move] + [m for m in moves if m != entry.move]
+
+def max_value(info: InfoSet, depth: int, player_id: int, turn: int, alpha: float = float('-inf'), beta: float = float('inf'), tt: TranspositionTable | None = None, deadline: float | None = None) -> float:
     """
     最大化プレイヤーの評価関数
     info: 情報セット
     depth: 探索の深さ
     player_id: プレイヤーID
+    tt: 置換表 (None なら使わない)
+    deadline: 制限時間 (time.monotonic() の値, 過ぎたら SearchTimeout を送出する)
     戻り値: 評価値 (整数)
     """
+    if not info.worlds: # 情報セットが空なら0を返す
+        return 0
+    check_deadline(deadline)
+    alpha_orig, beta_orig = alpha, beta
+    key, hit, alpha, beta = probe_tt(tt, info, depth, player_id, turn, alpha, beta)
+    if hit is not None:
+        return hit
+
     # 再帰の終了条件または例外的に評価値を返す場合
-    if depth == 0 or not info.worlds: # 探索の深さが0または情報セットが空なら評価値を返す
-        return evaluate(info, player_id, turn) if info.worlds else 0
-    
-    if all(world.is_game_over() for world in info.worlds): # 全ての世界がゲーム終了なら評価値を返す
-        return evaluate(info, player_id, turn) if info.worlds else 0
+    if depth == 0 or all(world.is_game_over() for world in info.worlds): # 探索の深さが0または全ての世界がゲーム終了なら評価値を返す
+        value = evaluate(info, player_id, turn)
+        if tt is not None:
+            tt.store(key, depth, value, Bound.EXACT)
+        return value
 
-    common = info.possible_moves(player_id)
-    union = info.union_moves(player_id)
+    part = info.partition(player_id) # 合法手を世界ごとに1回だけ求めて、共通の手・全体の手・手ごとの世界に分ける
+    common, union = part.common, part.union
 
     if not union: # 合法手がなければ評価値を返す
         return evaluate(info, player_id, turn)
     if not common:
-        return min_value(info, depth - 1, 1 - player_id, turn + 1, alpha, beta) # 合法手がない場合は相手の手を評価する
+        return min_value(info, depth - 1, 1 - player_id, turn + 1, alpha, beta, tt, deadline) # 合法手がない場合は相手の手を評価する
 
     # 合法手がある場合
-    moves = common if common else {None} # 合法手がない場合はNoneを候補にする
-    for move in moves: # 各可能な着手を試す
-        if move is None: # パスの場合
-            value = min_value(info, depth - 1, 1 - player_id, turn + 1, alpha, beta)
-            continue
-        next_worlds = set()
-        for world in info.worlds:
-            if move in world.get_legal_moves(player_id): # 合法手であれば、着手を適用した新しい世界を生成
-                new_world = copy.deepcopy(world) # 盤面をコピー
-                new_world.place(move[0], move[1], player_id) # 着手を適用
-                next_worlds.add(new_world) # 新しい盤面を次の世界として追加
-        if not next_worlds:
+    best_move = None
+    for move in order_moves(tt, key, common): # 各可能な着手を試す (置換表の最善手から)
+        next_info, pushed = push_worlds(part.worlds[move], move, player_id) # 合法な世界にだけ着手を適用する
+        if not pushed:
             continue
-        value = min_value(InfoSet(list(next_worlds)), depth - 1, 1 - player_id, turn+1, alpha, beta)
-        alpha = max(alpha, value)
+        try:
+            value = min_value(next_info, depth - 1, 1 - player_id, turn+1, alpha, beta, tt, deadline)
+        finally:
+            pop_move(pushed) # 着手を取り消して盤面を元に戻す (時間切れでも必ず戻す)
+        if value > alpha:
+            alpha = value
+            best_move = move
         if alpha >= beta:
             break
+    if tt is not None:
+        tt.store(key, depth, alpha, bound_for(alpha, alpha_orig, beta_orig), best_move)
     return alpha
 
-def min_value(info: InfoSet, depth: int, player_id: int, turn: int, alpha: float = float('-inf'), beta: float = float('inf')) -> float:
+def min_value(info: InfoSet, depth: int, player_id: int, turn: int, alpha: float = float('-inf'), beta: float = float('inf'), tt: TranspositionTable | None = None, deadline: float | None = None) -> float:
     """
     最小化プレイヤーの評価関数
     info: 情報セット
     depth: 探索の深さ
     player_id: プレイヤーID
+    tt: 置換表 (None なら使わない)
+    deadline: 制限時間 (time.monotonic() の値, 過ぎたら SearchTimeout を送出する)
     戻り値: 評価値 (整数)
     """
+    if not info.worlds: # 情報セットが空なら0を返す
+        return 0
+    check_deadline(deadline)
+    alpha_orig, beta_orig = alpha, beta
+    key, hit, alpha, beta = probe_tt(tt, info, depth, player_id, turn, alpha, beta)
+    if hit is not None:
+        return hit
+
     # 再帰の終了条件または例外的に評価値を返す場合
-    if depth == 0 or not info.worlds: # 探索の深さが0または情報セットが空なら評価値を返す
-        return evaluate(info, player_id, turn) if info.worlds else 0
-    
-    if all(world.is_game_over() for world in info.worlds): # 全ての世界がゲーム終了なら評価値を返す
-        return evaluate(info, player_id, turn) if info.worlds else 0
+    if depth == 0 or all(world.is_game_over() for world in info.worlds): # 探索の深さが0または全ての世界がゲーム終了なら評価値を返す
+        value = evaluate(info, player_id, turn)
+        if tt is not None:
+            tt.store(key, depth, value, Bound.EXACT)
+        return value
 
-    common = info.possible_moves(player_id)
-    union = info.union_moves(player_id)
+    part = info.partition(player_id) # 合法手を世界ごとに1回だけ求めて、共通の手・全体の手・手ごとの世界に分ける
+    common, union = part.common, part.union
 
     if not union: # 合法手がなければ評価値を返す
         return evaluate(info, player_id, turn)
     if not common:
-        return max_value(info, depth - 1, 1 - player_id, turn + 1, alpha, beta) # 合法手がない場合は相手の手を評価する
+        return max_value(info, depth - 1, 1 - player_id, turn + 1, alpha, beta, tt, deadline) # 合法手がない場合は相手の手を評価する
 
     # 合法手がある場合
-    moves = common if common else {None} # 合法手がない場合はNoneを候補にする
-    for move in moves: # 各可能な着手を試す
-        if move is None: # パスの場合
-            value = max_value(info, depth - 1, 1 - player_id, turn + 1, alpha, beta)
-            continue
-        next_worlds = set()
-        for world in info.worlds:
-            if move in world.get_legal_moves(player_id): # 合法手であれば、着手を適用した新しい世界を生成
-                new_world = copy.deepcopy(world) # 盤面をコピー
-                new_world.place(move[0], move[1], player_id) # 着手を適用
-                next_worlds.add(new_world) # 新しい盤面を次の世界として追加
-        if not next_worlds:
+    best_move = None
+    for move in order_moves(tt, key, common): # 各可能な着手を試す (置換表の最善手から)
+        next_info, pushed = push_worlds(part.worlds[move], move, player_id) # 合法な世界にだけ着手を適用する
+        if not pushed:
             continue
-        value = max_value(InfoSet(list(next_worlds)), depth - 1, 1 - player_id, turn + 1, alpha, beta)
-        beta = min(beta, value)
+        try:
+            value = max_value(next_info, depth - 1, 1 - player_id, turn + 1, alpha, beta, tt, deadline)
+        finally:
+            pop_move(pushed) # 着手を取り消して盤面を元に戻す (時間切れでも必ず戻す)
+        if value < beta:
+            beta = value
+            best_move = move
         if beta <= alpha:
             break
+    if tt is not None:
+        tt.store(key, depth, beta, bound_for(beta, alpha_orig, beta_orig), best_move)
     return beta
 
-def is_minimax(info: InfoSet, depth: int, player_id: int, turn: int) -> int:
+def is_minimax(info: InfoSet, depth: int, player_id: int, turn: int, tt: TranspositionTable | None = None) -> int:
     """
     情報集合ミニマックス法により評価値を計算する関数
     info: 情報セット
     depth: 探索の深さ
     player_id: プレイヤーID
+    tt: 置換表 (None なら使わない)
     戻り値: 評価値 (整数)
     """
-    return max_value(info, depth, player_id, turn)
+    return max_value(info, depth, player_id, turn, tt=tt)
+
+def candidate_moves(info: InfoSet, player_id: int) -> set[Move | None]:
+    """
+    ルートで試す着手の候補を求める関数
+    一部の世界でしか打てない手がある場合は、パス (None) も候補に加える
+    """
+    part = info.partition(player_id)
+    common = part.common # 指定プレイヤーの合法手を取得
+    union = part.union # 指定プレイヤーの全合法手を取得
+    candidates = set(common) # 合法手の候補をセットにする
+    if common != union:
+        candidates.add(None) # パスを候補に追加
+    if not candidates:
+        candidates = set(union) # 合法手がない場合は、全ての合法手を候補にする
+    return candidates
 
-def choose_move(info: InfoSet, depth: int, player_id: int, turn: int) -> Move | None:
+def choose_move(info: InfoSet, depth: int, player_id: int, turn: int, tt: TranspositionTable | None = None,
+                deadline: float | None = None, first: Move | None = None) -> Move | None:
     """
     情報集合ミニマックス法により最適な着手を選択する関数
     info: 情報セット
     depth: 探索の深さ
     player_id: プレイヤーID
+    tt: 置換表 (None なら使わない)
+    deadline: 制限時間 (time.monotonic() の値, 過ぎたら SearchTimeout を送出する)
+    first: 最初に探索する着手 (前回の反復の最善手)
     戻り値: 最適な着手 (Move) または None
     """
     best_val = float('-inf')
     best_move = None
-    common = info.possible_moves(player_id) # 指定プレイヤーの合法手を取得
-    union = info.union_moves(player_id) # 指定プレイヤーの全合法手を取得
-    candidate_moves = set(common) # 合法手の候補をセットにする
-    if common != union:
-        candidate_moves.add(None) # パスを候補に追加
-    if not candidate_moves:
-        candidate_moves = info.union_moves(player_id) # 合法手がない場合は、全ての合法手を候補にする
-    
-    for move in candidate_moves: # 各候補手を評価
-        next_worlds = set()
-        for world in info.worlds:
-            if move in world.get_legal_moves(player_id):
-                new_world = copy.deepcopy(world)
-                new_world.place(move[0], move[1], player_id)
-                next_worlds.add(new_world)
-        if not next_worlds:
+    moves = list(candidate_moves(info, player_id))
+    if first in moves:
+        moves.remove(first)
+        moves.insert(0, first) # 前回の最善手を先に探索し、評価値が並んだときはそれを選ぶ
+    for move in moves: # 各候補手を評価
+        next_info, pushed = push_move(info, move, player_id)
+        if not pushed:
             continue
-        value = min_value(InfoSet(list(next_worlds)), depth - 1, 1 - player_id, turn + 1)
+        try:
+            value = min_value(next_info, depth - 1, 1 - player_id, turn + 1, tt=tt, deadline=deadline)
+        finally:
+            pop_move(pushed)
         if value > best_val:
             best_val = value
             best_move = move
     return best_move
 
-class IsMinimaxPlayer(Player):
+def iterative_deepening(info: InfoSet, max_depth: int, player_id: int, turn: int, time_limit: float,
+                        tt: TranspositionTable | None = None) -> tuple[Move | None, int]:
+    """
+    制限時間の中で深さ1から順に探索を深める関数 (反復深化)
+    時間切れになった反復の結果は捨て、最後に完了した反復の最善手を返す
+    前回の反復の最善手をルートで最初に探索し、置換表に残った最善手で内部のノードも並べ替える
+    深さ1の反復は制限時間に関係なく必ず完了させる
+    max_depth: 探索の深さの上限
+    time_limit: 1手あたりの制限時間 (秒)
+    戻り値: (最適な着手 または None, 完了した反復の深さ)
+    """
+    deadline = time.monotonic() + time_limit
+    best_move = choose_move(info, 1, player_id, turn, tt)
+    reached = 1
+    for depth in range(2, max_depth + 1):
+        if time.monotonic() > deadline:
+            break
+        try:
+            best_move = choose_move(info, depth, player_id, turn, tt, deadline, best_move)
+        except SearchTimeout:
+            break
+        reached = depth
+    return best_move, reached
+
+_worker_tt: TranspositionTable | None = None # ワーカープロセスごとの置換表 (プロセスを使い回すのでターンをまたいで残る)
+
+def search_root_move(task: tuple) -> float | None:
+    """
+    ワーカープロセスで1つのルートの着手を評価する関数
+    task: (pack_info_set() で変換した情報集合, 着手, 探索の深さ, プレイヤーID, ターン数, 置換表のエントリ数)
+    戻り値: 評価値 (着手できる世界が無ければ None)
+    """
+    global _worker_tt
+    packed, move, depth, player_id, turn, tt_size = task
+    if tt_size and _worker_tt is None:
+        _worker_tt = TranspositionTable(tt_size)
+    info = unpack_info_set(packed, BoardState)
+    next_info, pushed = push_move(info, move, player_id)
+    if not pushed:
+        return None
+    return min_value(next_info, depth - 1, 1 - player_id, turn + 1, tt=_worker_tt)
+
+def choose_move_parallel(info: InfoSet, depth: int, player_id: int, turn: int, search: ParallelSearch, tt_size: int = 0) -> Move | None:
+    """
+    ルートの着手ごとの探索をプロセスプールで並列に行い、最適な着手を選択する関数
+    各着手は choose_move と同じく全幅の窓で探索するので、選ぶ着手は逐次版と同じになる
+    search: ワーカープロセスのプール
+    tt_size: ワーカーごとの置換表のエントリ数 (0なら置換表を使わない)
+    戻り値: 最適な着手 (Move) または None
+    """
+    moves = list(candidate_moves(info, player_id))
+    packed = pack_info_set(info) # 盤面は (board_key, 多重度) の組で送る
+    values = search.map(search_root_move, [(packed, move, depth, player_id, turn, tt_size) for move in moves])
+    best_val = float('-inf')
+    best_move = None
+    for move, value in zip(moves, values):
+        if value is not None and value > best_val:
+            best_val = value
+            best_move = move
+    return best_move
+
+class IsMinimaxPlayer(InfoSetPlayer):
     """
     情報集合ミニマックスアルゴリズムを使用して着手を選ぶプレイヤークラス
+    情報集合の更新は InfoSetPlayer が行う
     """
-    def __init__(self, depth=4):
+    def __init__(self, depth=4, tt_size=1 << 16, max_worlds: int | None = None, seed: int = 0, workers: int = 0,
+                 time_limit: float | None = None, endgame_empties: int = ENDGAME_EMPTIES, book: OpeningBook | None = None):
         """
         コンストラクタ
-        depth: ミニマックスの探索の深さ (デフォルト値は4)
+        depth: ミニマックスの探索の深さ (デフォルト値は4, time_limit を指定した場合は深さの上限)
+        tt_size: 置換表のエントリ数 (0なら置換表を使わない)
+        max_worlds: 情報集合の世界の数の上限 (None なら上限なし、超えた分は一様に間引く)
+        seed: 間引きと作り直しに使う乱数の種
+        workers: ルートの着手を並列に探索するワーカープロセスの数 (1以下なら並列化しない)
+        time_limit: 1手あたりの制限時間 (秒, 指定すると反復深化で探索する, 並列探索より優先)
+        endgame_empties: 空きマスがこの数以下になったら評価関数の代わりに読み切る (0なら読み切らない)
+        book: 定石 (None なら使わない, 定石にある局面では探索しない)
         """
-        super().__init__()
+        super().__init__(max_worlds, seed, BoardState, endgame_empties, book)
         self.depth = depth
-        self.info_set: InfoSet = None # 情報集合を初期化する
-        self.just_moved = False # 最後の着手が自分の手かどうか
-        self._pending_move: Move | None = None # 直前に送った手
-        self._info_snapshot: InfoSet | None = None # 直前の情報集合のスナップショット
-        self.turn = 0 # ターン数を初期化
+        self.tt_size = tt_size
+        self.tt = TranspositionTable(tt_size) if tt_size else None # 置換表 (ターンをまたいで使い回す)
+        self.search = ParallelSearch(workers) if workers > 1 else None # ワーカープロセスのプール (ターンをまたいで使い回す)
+        self.time_limit = time_limit
+        self.last_depth = 0 # 直前の着手で探索を完了した深さ
     
     def name(self) -> str:
         return "IsMinimaxPlayer"
-    
-    def action(self) -> str:
+
+    def close(self) -> None:
         """
-        情報集合ミニマックスアルゴリズムを使用して最適な着手を選ぶ関数
+        並列探索のワーカープロセスを終了する関数
         """
-        if self.info_set is None:
-            self.info_set = InfoSet([OthelloField()]) # 初期世界として、相手の石も含めた初期盤面を設定する
-        
-        move = choose_move(self.info_set, self.depth, self.player_id, self.turn)
-        if move is None:
-            self.just_moved = False
-            return "PASSED"
-        
-        self._pending_move = move
-        self._info_snapshot = copy.deepcopy(self.info_set) # 現在の情報集合をスナップショットとして保存
-
-        print(f"Chosen move: {move[0]} {move[1]}")
-        return f"MOVE {move[0]} {move[1]}"
+        if self.search is not None:
+            self.search.shutdown()
     
-    def handle_message(self, msg: str) -> None:
+    def select_move(self) -> Move | None:
         """
-        サーバから来る BOARD, FLIP_COUNT, TURN_ENDなどのメッセージを受け取って
-        可視盤面自体の更新と、相手手を仮定して世界の更新を行う
+        情報集合ミニマックスアルゴリズムを使用して最適な着手を選ぶ関数
+        序盤は定石、終盤は読み切りの結果を使う
         """
-        parts = msg.split()
-        cmd = parts[0]
-
-        if cmd == Command.ILLEGAL_COUNT.value:
-            if self._pending_move is not None and self._info_snapshot is not None:
-                move = self._pending_move
-                legal_worlds = [
-                    world for world in self._info_snapshot.worlds
-                    if move not in world.get_legal_moves(self.player_id)
-                ]
-                self.info_set = InfoSet(legal_worlds or self._info_snapshot.worlds)
-            self._pending_move = self._info_snapshot = None # スナップショットをクリア
-            return
-
-        elif cmd == Command.BOARD.value:
-            super().handle_message(msg) # player_base.pyのhandle_messageを呼び出して盤面を更新
-            if self.info_set is None:
-                # 初回のBOARD受信時にのみInfoSetを初期生成する
-                self.info_set = InfoSet([OthelloField()]) # 初期世界として、相手の石も含めた初期盤面を設定する
-                self.last_flip_count = 0
-            else:
-                if self.just_moved:
-                    self.just_moved = False # 最後の着手が自分の手であった場合はフラグをリセットする
-                    self._pending_move = self._info_snapshot = None # スナップショットをクリア
-                else:
-                    # 相手の手を仮定して情報集合を更新する
-                    self._update_info_set()
-            self.turn += 1
-
-        elif cmd == Command.FLIP_COUNT.value:
-            self.last_flip_count = int(parts[1]) # 最後のひっくり返った石の数を更新
-
-            if self._pending_move is not None and self.last_flip_count > 0:
-                x, y = self._pending_move
-                worlds = []
-                for world in self.info_set.worlds:
-                    if (x, y) in world.get_legal_moves(self.player_id):
-                        new_world = copy.deepcopy(world)
-                        new_world.place(x, y, self.player_id)
-                        worlds.append(new_world)
-                if worlds:
-                    self.info_set = InfoSet(worlds)
-                else:
-                    print("Warning: No valid worlds after flip count update.")
-                self._pending_move = self._info_snapshot = None # スナップショットをクリア
-                self.just_moved = True
-            
-            else:
-                # 最後の着手が自分の手でなかった場合は、情報集合を更新しない
-                self.just_moved = False
-            return
-
-        else:
-            super().handle_message(msg)
-
-
-    def _update_info_set(self):
-        new_worlds: list[BoardState] = []
-        visible_board = self.field.get_visible_board(self.player_id)
-        flip_count = self.last_flip_count
-
-        if flip_count == 0:
-            # パスは合法手の有無に依らず起こり得るので、可視盤面の不変性で整合性を取る
-            for world in self.info_set.worlds:
-                if world.get_visible_board(self.player_id) == visible_board:
-                    new_worlds.append(copy.deepcopy(world))
-            if new_worlds:
-                self.info_set = InfoSet(new_worlds)
-            # 一致が無ければ、古い集合を保持（破綻防止）
-            return
-
-        for world in self.info_set.worlds:
-            opp = 1 - self.player_id
-            for move in world.get_legal_moves(opp):
-                new_world = copy.deepcopy(world)
-                flips = new_world.place(move[0], move[1], opp)
-                if new_world.get_visible_board(self.player_id) == visible_board and flips == flip_count:
-                    new_worlds.append(new_world)
-
-        if new_worlds:
-            self.info_set = InfoSet(new_worlds)
+        move = self.book_move()
+        if move is not None:
+            print(f"Chosen move: {move[0]} {move[1]} (book)")
+            return move
+        move = self.solve_endgame()
+        if move is not None:
+            print(f"Chosen move: {move[0]} {move[1]} (endgame)")
+            return move
+        if self.time_limit is not None:
+            move, self.last_depth = iterative_deepening(self.info_set, self.depth, self.player_id, self.turn, self.time_limit, self.tt)
+        elif self.search is not None:
+            move = choose_move_parallel(self.info_set, self.depth, self.player_id, self.turn, self.search, self.tt_size)
+            self.last_depth = self.depth
         else:
-            # 整合性が取れない場合は、現在の情報集合を保持
-            for world in self.info_set.worlds:
-                new_world = copy.deepcopy(world)
-                if new_world.get_visible_board(self.player_id) == visible_board:
-                    new_worlds.append(new_world)
-            if new_worlds:
-                self.info_set = InfoSet(new_worlds)
-            else:
-                print("Warning: No matching worlds found after opponent's move. Keeping current info set.")
+            move = choose_move(self.info_set, self.depth, self.player_id, self.turn, self.tt)
+            self.last_depth = self.depth
+        if move is not None:
+            print(f"Chosen move: {move[0]} {move[1]} (depth {self.last_depth})")
+        return move
 
 if __name__=="__main__":
     host,port = sys.argv[1], int(sys.argv[2]) # コマンドライン引数からホストとポートを取得
-    play_game(host, port, IsMinimaxPlayer()) # 情報集合ミニマックスプレイヤーでゲームを開始
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else 0 # 並列探索のワーカープロセスの数 (省略時は並列化しない)
+    player = IsMinimaxPlayer(workers=workers)
+    try:
+        play_game(host, port, player) # 情報集合ミニマックスプレイヤーでゲームを開始
+    finally:
+        player.close()
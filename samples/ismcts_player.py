@@ -0,0 +1,12 @@
+# othello_pyファイルからのインポートを行うための設定
+import sys, os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from othello_py import play_game
+from othello_py.ismcts import ISMCTSPlayer
+
+if __name__=="__main__":
+    host,port = sys.argv[1], int(sys.argv[2]) # コマンドライン引数からホストとポートを取得
+    time_limit = float(sys.argv[3]) if len(sys.argv) > 3 else None # 1手あたりの制限時間 (秒, 省略時は反復回数だけで止める)
+    ponder = len(sys.argv) > 4 and sys.argv[4] == "ponder" # 4つ目の引数が ponder なら相手の手番の間に先読みする
+    play_game(host, port, ISMCTSPlayer(time_limit=time_limit, ponder=ponder)) # ISMCTSプレイヤーでゲームを開始
@@ -9,6 +9,10 @@ def main():
     p.add_argument("--port", type=int, default=8000)
     p.add_argument("--games", type=int, default=1)
     p.add_argument("--quiet", action="store_true")
+    p.add_argument("--bitboard", action="store_true")
+    p.add_argument("--async", dest="use_async", action="store_true") # 複数の対局を同時に進める
+    p.add_argument("--time", type=float, default=None) # 1人あたりの持ち時間 (秒, 省略時は無制限)
+    p.add_argument("--increment", type=float, default=0.0) # 1手ごとに加算する時間 (秒)
     args = p.parse_args()
 
     logging.basicConfig(
@@ -16,8 +20,11 @@ def main():
         format="[%(asctime)s] %(levelname)s: %(message)s"
     )
 
-    othello_py.server_main(
-        args.host, args.port, args.games, quiet=args.quiet
+    serve = othello_py.async_server_main if args.use_async else othello_py.server_main
+    serve(
+        args.host, args.port, args.games, quiet=args.quiet,
+        field_cls=othello_py.BitboardField if args.bitboard else othello_py.Field,
+        time_control=None if args.time is None else othello_py.TimeControl(args.time, args.increment)
     )
 
 if __name__=="__main__":
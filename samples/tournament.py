@@ -0,0 +1,37 @@
+"""
+サンプルのプレイヤー同士で、総当たり戦または挑戦者と残り全員の対戦を行うツール
+例: python samples/tournament.py --schedule round-robin --games 10 --workers 4 --out results.jsonl
+"""
+import sys, os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import argparse, functools, othello_py
+from othello_py import ISMCTSPlayer
+from random_player import RandomPlayer
+from minimax_player import MinimaxPlayer
+from isMinimax_player import IsMinimaxPlayer
+
+# 参加者 (名前, プレイヤーを作る関数) (gauntlet では最初の参加者が挑戦者になる)
+ENTRANTS = [
+    ("ismcts-300", functools.partial(ISMCTSPlayer, iterations=300)),
+    ("isminimax-2", functools.partial(IsMinimaxPlayer, depth=2)),
+    ("minimax-3", functools.partial(MinimaxPlayer, depth=3)),
+    ("random", RandomPlayer),
+]
+
+def main():
+    p = argparse.ArgumentParser(__doc__)
+    p.add_argument("--schedule", choices=("round-robin", "gauntlet"), default="round-robin")
+    p.add_argument("--games", type=int, default=2) # 1組あたりの対局数
+    p.add_argument("--workers", type=int, default=None) # ワーカープロセスの数 (省略時は CPU のコア数, 0 なら並列化しない)
+    p.add_argument("--out", default=None) # 結果を追記する JSONL ファイル
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args()
+
+    othello_py.run_tournament(
+        ENTRANTS, args.schedule, args.games,
+        workers=args.workers, out_path=args.out, seed=args.seed
+    )
+
+if __name__=="__main__":
+    main()
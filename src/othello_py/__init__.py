@@ -1,18 +1,48 @@
 from .piece import Piece
 from .player_base import Player, play_game
-from .server import server_main
+from .server import server_main, TimeControl
+from .async_server import async_server_main
 from .field import OthelloField as Field
-from .protocol import Command, Protocol, serialize_board, parse_move
+from .bitboard import BitboardField
+from .compact import CompactField
+from .protocol import Command, Protocol, LineChannel, serialize_board, serialize_board_mask, parse_board, parse_move, compact_move
+from .transposition import Bound, TranspositionTable
+from .batch import BoardBatch
+from .infoset import InfoSet
+from .parallel import ParallelSearch
+from .infoset_player import InfoSetPlayer
+from .ismcts import ISMCTSPlayer
+from .endgame import solve, best_move, solve_info_set
+from .book import OpeningBook, build_book
+from .search import NegamaxEngine, SearchResult
+from .match import MatchResult, run_match, run_matches
+from .tournament import Standings, run_tournament
 
 __all__ = [
     'Field', # Othelloの盤面クラス
+    'BitboardField', # ビットボードによるOthelloの盤面クラス
+    'CompactField', # bytearray による省メモリのOthelloの盤面クラス
     'Piece', # Othelloの石クラス
     'Player', # プレイヤーのクラス
     'play_game', # プレイヤーとサーバを接続して対局する関数 
     'Command', # コマンド定数
     'Protocol', # 挨拶と勝敗を通知するクラス
+    'LineChannel', # ソケットで1行ずつのメッセージをまとめて送受信するクラス
     'serialize_board', 'parse_move', # 盤面を文字列に変換する関数, 着手を解析する関数
-    'server_main' # サーバのメイン関数
+    'serialize_board_mask', 'parse_board', 'compact_move', # 16進数の盤面への変換, 盤面の解析, 着手をマスの番号にする関数
+    'server_main', 'TimeControl', # サーバのメイン関数, 持ち時間 (チェスクロック方式)
+    'async_server_main', # 複数の対局を同時に進める asyncio 版のサーバのメイン関数
+    'Bound', 'TranspositionTable', # 置換表の評価値の種類, 置換表クラス
+    'BoardBatch', # 複数の盤面をまとめて評価するクラス (numpy が必要)
+    'InfoSet', # 可能性のある盤面 (世界) の集合を管理するクラス
+    'ParallelSearch', # 探索をプロセスプールで並列に実行するクラス
+    'InfoSetPlayer', # 情報集合を管理するプレイヤーの基底クラス
+    'ISMCTSPlayer', # 情報集合モンテカルロ木探索のプレイヤークラス
+    'solve', 'best_move', 'solve_info_set', # 終盤の読み切り (石差, 1つの世界の最善手, 情報集合での最善手)
+    'OpeningBook', 'build_book', # 定石を引くクラス, 定石ファイルを作る関数
+    'NegamaxEngine', 'SearchResult', # 完全情報のネガマックス探索クラス, 探索の結果
+    'MatchResult', 'run_match', 'run_matches', # 対局の結果, ソケットを使わずに対局させる関数 (1局, 複数局)
+    'Standings', 'run_tournament', # 参加者ごとの成績, 総当たり戦や挑戦者の対戦を並列に行う関数
 ]
 
 
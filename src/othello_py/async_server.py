@@ -0,0 +1,100 @@
+import asyncio
+import logging
+import time
+from typing import List, Optional, Tuple
+from .field import OthelloField
+from .server import TimeControl, game_steps
+
+Stream = Tuple[asyncio.StreamReader, asyncio.StreamWriter]
+
+async def handle_game_async(streams: List[Stream], quiet=False, field_cls=OthelloField,
+                            time_control: Optional[TimeControl] = None):
+    '''
+    ゲームのメインループを asyncio で処理する関数 (規則は同期版と同じ game_steps を使う)
+    streams: クライアントごとの (StreamReader, StreamWriter) のリスト
+    quiet: Trueならサーバ側のログを抑制する
+    field_cls: 盤面クラス (OthelloField または BitboardField)
+    time_control: 持ち時間 (None なら無制限)
+    '''
+    steps = game_steps(field_cls, time_control)
+    step = next(steps)
+    while True:
+        for (_, writer), lines in zip(streams, step.out): # 各プレイヤーへ、溜めた行をまとめて1回で送信する
+            if lines:
+                writer.write(''.join(f"{line}\n" for line in lines).encode('utf-8'))
+        for _, writer in streams:
+            await writer.drain()
+        if step.read is None:
+            return
+        reader, _ = streams[step.read]
+        start = time.monotonic()
+        try:
+            # プレイヤーからの入力を残り時間だけ待つ (待つ間、他の対局を進める)
+            line = (await asyncio.wait_for(reader.readline(), step.timeout)).decode('utf-8')
+        except asyncio.TimeoutError:
+            line = "" # 時間切れ (待った時間が残り時間を超えるので負けになる)
+        try:
+            step = steps.send((line, time.monotonic() - start))
+        except StopIteration:
+            return
+
+async def serve_async(host: str, port: int, games: int = 1, *, quiet=False, field_cls=OthelloField,
+                      time_control: Optional[TimeControl] = None):
+    '''
+    接続を受け付け続け、到着順に2人ずつ組にして、複数の対局を1つのイベントループで同時に進める関数
+    games 局が終わったらサーバを閉じる (それ以降に来た接続はすぐに切る)
+    '''
+    done = asyncio.Event()
+    waiting: List[Stream] = [] # 対戦相手を待っているクライアント
+    tasks = set() # 進行中の対局 (タスクが途中で回収されないように参照を持つ)
+    started = finished = 0
+
+    async def run(pair: List[Stream], number: int):
+        nonlocal finished
+        try:
+            await handle_game_async(pair, quiet=quiet, field_cls=field_cls, time_control=time_control)
+        except (ConnectionError, UnicodeDecodeError) as e:
+            logging.error(f"Game {number} aborted: {e}")
+        finally:
+            for _, writer in pair:
+                writer.close()
+            finished += 1
+            if finished >= games:
+                done.set()
+
+    def on_connect(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        nonlocal started
+        if started >= games:
+            writer.close()
+            return
+        logging.info(f"Player connected from {writer.get_extra_info('peername')}")
+        waiting.append((reader, writer))
+        if len(waiting) == 2:
+            pair = waiting[:]
+            waiting.clear()
+            started += 1
+            logging.info(f"Starting game {started}")
+            task = asyncio.ensure_future(run(pair, started))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+    server = await asyncio.start_server(on_connect, host, port)
+    logging.info(f"Waiting for players at {host}:{port}")
+    async with server:
+        await done.wait()
+    for _, writer in waiting:
+        writer.close()
+
+def async_server_main(host: str, port: int, games: int = 1, *, quiet=False, field_cls=OthelloField,
+                      time_control: Optional[TimeControl] = None):
+    """
+    asyncio 版のOthelloサーバーのメイン関数
+    通信の手順は server_main と同じで、遅いクライアントがいても他の対局は止まらない
+    host: ホスト名またはIPアドレス
+    port: ポート番号
+    games: ゲームの回数（デフォルトは1）
+    quiet: Trueならサーバ側のログを抑制する
+    field_cls: 盤面クラス (OthelloField または BitboardField)
+    time_control: 持ち時間 (None なら無制限)
+    """
+    asyncio.run(serve_async(host, port, games, quiet=quiet, field_cls=field_cls, time_control=time_control))
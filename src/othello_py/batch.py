@@ -0,0 +1,120 @@
+from typing import Iterable, List, Tuple
+from .bitboard import SIZE, FULL, CORNER_MASK, EDGE_MASK, DIRECTIONS
+
+try:
+    import numpy as np
+except ImportError: # numpy は任意の依存なので、無い環境でも import だけはできるようにする
+    np = None
+
+HAS_NUMPY = np is not None # BoardBatch が使えるかどうか
+
+def _popcount(a):
+    """
+    uint64 配列の要素ごとの立っているビット数を返す関数
+    """
+    if hasattr(np, 'bitwise_count'): # numpy 2.0 以降
+        return np.bitwise_count(a).astype(np.int64)
+    table = np.array([bin(i).count('1') for i in range(256)], dtype=np.int64)
+    return table[a.view(np.uint8).reshape(-1, 8)].sum(axis=1)
+
+def _shift(bits, amount: int, mask: int):
+    """
+    uint64 配列の各要素を指定方向に1マスずらす関数 (bitboard._shift の配列版)
+    """
+    if amount > 0:
+        return (bits << np.uint64(amount)) & np.uint64(mask & FULL)
+    return (bits >> np.uint64(-amount)) & np.uint64(mask)
+
+class BoardBatch:
+    """
+    複数の盤面をまとめてベクトル演算で評価するためのクラス (numpy が必要)
+    N 個の盤面を黒・白それぞれの uint64 配列 (N,) のビットボードとして持つ
+    black, white: 黒と白の石のマスクの配列
+    piece_diff, corner_diff, edge_diff, mobility_diff: 指定プレイヤーから見た差を (N,) の配列で返すメソッド
+    """
+
+    def __init__(self, boards: Iterable):
+        """
+        盤面のリストからバッチを作る
+        boards: board_key() を持つ盤面 (OthelloField, BitboardField, CompactField) の列
+        """
+        if np is None:
+            raise ImportError("BoardBatch requires numpy")
+        keys = [b.board_key() for b in boards]
+        self.black = np.fromiter((k[0] for k in keys), dtype=np.uint64, count=len(keys))
+        self.white = np.fromiter((k[1] for k in keys), dtype=np.uint64, count=len(keys))
+
+    @classmethod
+    def from_keys(cls, keys: List[Tuple[int, int]]) -> 'BoardBatch':
+        """
+        (黒のマスク, 白のマスク) のリストからバッチを作る
+        """
+        if np is None:
+            raise ImportError("BoardBatch requires numpy")
+        batch = cls.__new__(cls)
+        batch.black = np.array([k[0] for k in keys], dtype=np.uint64)
+        batch.white = np.array([k[1] for k in keys], dtype=np.uint64)
+        return batch
+
+    def __len__(self) -> int:
+        return len(self.black)
+
+    def _masks(self, player_id: int):
+        """
+        指定プレイヤーから見た (自分のマスク, 相手のマスク) を返す
+        """
+        return (self.black, self.white) if player_id == 0 else (self.white, self.black)
+
+    def to_array(self):
+        """
+        盤面を (N, SIZE, SIZE) の int8 配列で返す (0=空, 1=黒, 2=白)
+        """
+        bits = np.uint64(1) << np.arange(SIZE * SIZE, dtype=np.uint64)
+        black = (self.black[:, None] & bits) != 0
+        white = (self.white[:, None] & bits) != 0
+        cells = black.astype(np.int8) + 2 * white.astype(np.int8)
+        return cells.reshape(-1, SIZE, SIZE)
+
+    def legal_masks(self, player_id: int):
+        """
+        指定プレイヤーの合法手のマスクを (N,) の uint64 配列で返す
+        bitboard.legal_mask と同じ計算を全盤面に対して一度に行う
+        """
+        own, opp = self._masks(player_id)
+        empty = ~(own | opp) & np.uint64(FULL)
+        legal = np.zeros_like(own)
+        for amount, mask in DIRECTIONS:
+            t = _shift(own, amount, mask) & opp
+            for _ in range(SIZE - 3):
+                t |= _shift(t, amount, mask) & opp
+            legal |= _shift(t, amount, mask) & empty
+        return legal
+
+    def piece_diff(self, player_id: int):
+        """
+        石の数の差 (自分 - 相手)
+        """
+        own, opp = self._masks(player_id)
+        return _popcount(own) - _popcount(opp)
+
+    def corner_diff(self, player_id: int):
+        """
+        角の石の数の差 (自分 - 相手)
+        """
+        own, opp = self._masks(player_id)
+        m = np.uint64(CORNER_MASK)
+        return _popcount(own & m) - _popcount(opp & m)
+
+    def edge_diff(self, player_id: int):
+        """
+        辺の石の数の差 (自分 - 相手, 4隅は除外)
+        """
+        own, opp = self._masks(player_id)
+        m = np.uint64(EDGE_MASK)
+        return _popcount(own & m) - _popcount(opp & m)
+
+    def mobility_diff(self, player_id: int):
+        """
+        合法手の数の差 (自分 - 相手)
+        """
+        return _popcount(self.legal_masks(player_id)) - _popcount(self.legal_masks(1 - player_id))
@@ -0,0 +1,332 @@
+from typing import List, Optional, Tuple
+from .piece import Piece
+from .field import OthelloField
+
+SIZE = OthelloField.SIZE # 盤面のサイズ (6x6)
+CELLS = SIZE * SIZE # マスの数 (36)
+FULL = (1 << CELLS) - 1 # 全マスのビットマスク
+
+# 左端列・右端列を除いたマスク (横方向のシフトで行をまたいだビットを消すために使う)
+NOT_LEFT = sum(1 << (y * SIZE + x) for y in range(SIZE) for x in range(1, SIZE))
+NOT_RIGHT = sum(1 << (y * SIZE + x) for y in range(SIZE) for x in range(SIZE - 1))
+
+CORNER_MASK = sum(1 << i for i in (0, SIZE - 1, CELLS - SIZE, CELLS - 1)) # 4隅
+EDGE_MASK = sum(
+    1 << (y * SIZE + x)
+    for y in range(SIZE) for x in range(SIZE)
+    if x in (0, SIZE - 1) or y in (0, SIZE - 1)
+) & ~CORNER_MASK # 辺 (4隅は除外)
+
+# 8方向のシフト量と、シフト後に適用するマスク
+# 正の値は左シフト (インデックスが増える方向)、負の値は右シフト
+DIRECTIONS = (
+    (1, NOT_LEFT),          # 右
+    (-1, NOT_RIGHT),        # 左
+    (SIZE, FULL),           # 下
+    (-SIZE, FULL),          # 上
+    (SIZE + 1, NOT_LEFT),   # 右下
+    (SIZE - 1, NOT_RIGHT),  # 左下
+    (-SIZE + 1, NOT_LEFT),  # 右上
+    (-SIZE - 1, NOT_RIGHT), # 左上
+)
+
+def _shift(bits: int, amount: int, mask: int) -> int:
+    """
+    ビット列を指定方向に1マスずらす関数
+    """
+    if amount > 0:
+        return (bits << amount) & mask & FULL
+    return (bits >> -amount) & mask
+
+def legal_mask(own: int, opp: int) -> int:
+    """
+    合法手のビットマスクを計算する関数
+    own: 手番側の石のマスク
+    opp: 相手の石のマスク
+    戻り値: 合法手のマスク
+    """
+    empty = ~(own | opp) & FULL
+    legal = 0
+    for amount, mask in DIRECTIONS:
+        t = _shift(own, amount, mask) & opp
+        for _ in range(SIZE - 3): # 相手の石は最大 SIZE-2 個まで連続する
+            t |= _shift(t, amount, mask) & opp
+        legal |= _shift(t, amount, mask) & empty
+    return legal
+
+def flip_mask(own: int, opp: int, index: int) -> int:
+    """
+    指定マスに石を置いたときにひっくり返る石のマスクを計算する関数
+    own: 手番側の石のマスク
+    opp: 相手の石のマスク
+    index: 着手するマスのインデックス (y * SIZE + x)
+    戻り値: ひっくり返る石のマスク (着手できない場合は0)
+    """
+    bit = 1 << index
+    if (own | opp) & bit:
+        return 0
+    flips = 0
+    for amount, mask in DIRECTIONS:
+        f = 0
+        m = _shift(bit, amount, mask)
+        while m & opp:
+            f |= m
+            m = _shift(m, amount, mask)
+        if m & own:
+            flips |= f
+    return flips
+
+def iter_indices(bits: int):
+    """
+    マスク中の立っているビットのインデックスを小さい順に返すジェネレータ
+    """
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+class BitboardField:
+    """
+    ビットボードによるOthelloの盤面クラス
+    OthelloField と同じ公開APIを持ち、置き換えて使うことができる
+    bits: 黒と白それぞれの石を表す36ビットのマスク [黒, 白]
+    key: 盤面のZobristハッシュ値 (OthelloField と同じ乱数表を使う)
+    マス (x, y) はビット y * SIZE + x に対応する
+    """
+
+    SIZE = SIZE # 盤面のサイズ
+    ZOBRIST = OthelloField.ZOBRIST # マスごとの (黒, 白) の乱数
+
+    def __init__(self):
+        """
+        盤面の初期化を行う
+        初期配置は OthelloField と同じ
+        """
+        mid = self.SIZE // 2
+        white = (1 << ((mid - 1) * SIZE + mid - 1)) | (1 << (mid * SIZE + mid))
+        black = (1 << ((mid - 1) * SIZE + mid)) | (1 << (mid * SIZE + mid - 1))
+        self.bits: List[int] = [black, white]
+        self._history: List[Tuple[int, int, int]] = [] # push() 前のマスクとキーの記録
+        self.key = self._compute_key()
+        self._view = None # board のビューのキャッシュ ((黒のマスク, 白のマスク), ビュー)
+
+    def _compute_key(self) -> int:
+        """
+        盤面全体からZobristハッシュ値を計算する
+        """
+        key = 0
+        for owner in (0, 1):
+            for i in iter_indices(self.bits[owner]):
+                key ^= self.ZOBRIST[i][owner]
+        return key
+
+    def board_key(self) -> Tuple[int, int]:
+        """
+        盤面を (黒のマスク, 白のマスク) で返す
+        """
+        return self.bits[0], self.bits[1]
+
+    @classmethod
+    def from_board_key(cls, black: int, white: int) -> 'BitboardField':
+        """
+        (黒のマスク, 白のマスク) から盤面を作る (board_key() の逆)
+        """
+        field = cls.__new__(cls)
+        field.bits = [black, white]
+        field._history = []
+        field.key = field._compute_key()
+        field._view = None
+        return field
+
+    def __eq__(self, other) -> bool:
+        if not hasattr(other, 'board_key'):
+            return NotImplemented
+        return self.key == other.key and self.board_key() == other.board_key()
+
+    def __hash__(self) -> int:
+        return self.key
+
+    @property
+    def board(self) -> Tuple[Tuple[Optional[Piece], ...], ...]:
+        """
+        board[y][x] 形式の読み取り専用のビュー
+        マスでループしながら参照されるので、盤面が変わるまで (マスクが同じ間は) 同じビューを返す
+        """
+        bits = (self.bits[0], self.bits[1])
+        if self._view is None or self._view[0] != bits:
+            view = tuple(
+                tuple(
+                    None if (o := self.owner_at(x, y)) is None else Piece(o)
+                    for x in range(self.SIZE)
+                )
+                for y in range(self.SIZE)
+            )
+            self._view = (bits, view)
+        return self._view[1]
+
+    def check_in_bounds(self, x: int, y: int) -> bool:
+        """
+        指定された座標が盤面内にあるか判定するメソッド
+        """
+        return 0 <= x < self.SIZE and 0 <= y < self.SIZE
+
+    def owner_at(self, x: int, y: int) -> Optional[int]:
+        """
+        指定マスの石の所有者を返す (None=空)
+        """
+        bit = 1 << (y * SIZE + x)
+        if self.bits[0] & bit:
+            return 0
+        if self.bits[1] & bit:
+            return 1
+        return None
+
+    def set_square(self, x: int, y: int, owner: Optional[int]):
+        """
+        指定マスの状態を直接書き換える (None=空)
+        ひっくり返しは行わない
+        """
+        index = y * SIZE + x
+        bit = 1 << index
+        old = self.owner_at(x, y)
+        if old is not None:
+            self.bits[old] &= ~bit
+            self.key ^= self.ZOBRIST[index][old]
+        if owner is not None:
+            self.bits[owner] |= bit
+            self.key ^= self.ZOBRIST[index][owner]
+
+    def get_visible_board(self, player_id: int) -> List[List[Optional[int]]]:
+        '''
+        指定プレイヤーの視界に入る盤面を取得する関数
+        player_id: プレイヤーのID (0=黒, 1=白)
+        戻り値: 盤面の2次元リスト (None=空, player_id=そのプレイヤーの石)
+        '''
+        own = self.bits[player_id]
+        return [
+            [player_id if own >> (y * SIZE + x) & 1 else None for x in range(self.SIZE)]
+            for y in range(self.SIZE)
+        ]
+
+    def legal_mask(self, owner: int) -> int:
+        """
+        指定プレイヤーの合法手のマスクを返す
+        """
+        return legal_mask(self.bits[owner], self.bits[1 - owner])
+
+    def _captures(self, x: int, y: int, owner: int) -> List[Tuple[int,int]]:
+        '''
+        指定位置に石を置いたときに、ひっくり返る石の座標を取得する関数
+        '''
+        if not self.check_in_bounds(x, y):
+            return []
+        flips = flip_mask(self.bits[owner], self.bits[1 - owner], y * SIZE + x)
+        return [(i % SIZE, i // SIZE) for i in iter_indices(flips)]
+
+    def flip_mask(self, x: int, y: int, owner: int) -> int:
+        '''
+        指定位置に石を置いたときに、ひっくり返る石のマスクを返す関数
+        盤面は書き換えない (着手できない場合は0)
+        '''
+        if not self.check_in_bounds(x, y):
+            return 0
+        return flip_mask(self.bits[owner], self.bits[1 - owner], y * SIZE + x)
+
+    def legal_moves(self, owner: int) -> List[Tuple[int,int]]:
+        '''
+        指定プレイヤーの合法手を取得する関数
+        順序は OthelloField と同じ (x が外側のループ)
+        '''
+        return sorted((i % SIZE, i // SIZE) for i in iter_indices(self.legal_mask(owner)))
+
+    def place(self, x: int, y: int, owner: int) -> int:
+        '''
+        石をひっくり返し、その数を返す関数
+        '''
+        if not self.check_in_bounds(x, y):
+            raise ValueError("Illegal move")
+        index = y * SIZE + x
+        flips = flip_mask(self.bits[owner], self.bits[1 - owner], index)
+        if not flips:
+            raise ValueError("Illegal move")
+        self.bits[owner] |= flips | (1 << index)
+        self.bits[1 - owner] &= ~flips
+        z = self.ZOBRIST
+        key = self.key ^ z[index][owner]
+        for i in iter_indices(flips):
+            key ^= z[i][0] ^ z[i][1] # 色が入れ替わるので両方の乱数を反転する
+        self.key = key
+        return flips.bit_count()
+
+    def push(self, move: Optional[Tuple[int,int]], owner: int) -> int:
+        '''
+        着手を盤面に直接反映し、pop() で戻せるように記録する関数
+        move: 着手の座標 (None=パス)
+        戻り値: ひっくり返った石の数
+        '''
+        self._history.append((self.bits[0], self.bits[1], self.key))
+        if move is None:
+            return 0
+        try:
+            return self.place(move[0], move[1], owner)
+        except ValueError:
+            self._history.pop()
+            raise
+
+    def pop(self):
+        '''
+        直前の push() を取り消して盤面を元に戻す関数
+        '''
+        self.bits[0], self.bits[1], self.key = self._history.pop()
+
+    def copy(self) -> 'BitboardField':
+        '''
+        盤面のコピーを返す関数 (push の記録はコピーしない)
+        '''
+        new_field = self.__class__.__new__(self.__class__)
+        new_field.bits = list(self.bits)
+        new_field._history = []
+        new_field.key = self.key
+        new_field._view = self._view # ビューは読み取り専用なので共有してよい
+        return new_field
+
+    def get_legal_moves(self, owner: int):
+        """
+        legal_moves のエイリアスとして実装
+        指定プレイヤーの合法手を取得する
+        """
+        return self.legal_moves(owner)
+
+    def make_move(self, move: Tuple[int,int], owner: int) -> 'BitboardField':
+        """
+        この手を打った後の新しい盤面を返す
+        マスク2つをコピーするだけなので deepcopy より軽い
+        """
+        new_field = self.copy()
+        x, y = move
+        new_field.place(x, y, owner)
+        return new_field
+
+    def is_game_over(self) -> bool:
+        """
+        両プレイヤーに合法手がなければゲーム終了とみなす
+        """
+        return not self.legal_mask(0) and not self.legal_mask(1)
+
+    def count_pieces(self, owner: int) -> int:
+        """
+        指定プレイヤーの石の数をカウントする
+        """
+        return self.bits[owner].bit_count()
+
+    def count_corner_pieces(self, owner: int) -> int:
+        """
+        指定プレイヤーの角の石の数をカウントする
+        """
+        return (self.bits[owner] & CORNER_MASK).bit_count()
+
+    def count_edge_pieces(self, owner: int) -> int:
+        """
+        指定プレイヤーの辺の石の数をカウントする (4隅は除外)
+        """
+        return (self.bits[owner] & EDGE_MASK).bit_count()
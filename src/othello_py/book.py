@@ -0,0 +1,197 @@
+import mmap
+import struct
+from typing import Dict, Optional, Tuple
+from .bitboard import SIZE, CELLS, legal_mask, flip_mask, iter_indices
+from .zobrist import mask_hash
+from .search import NegamaxEngine, evaluate
+
+Move = Tuple[int, int]
+BookKey = Tuple[int, int, int] # (黒のマスク, 白のマスク, 手番) (対称変換で正規化したもの)
+
+MAGIC = b'OBK1' # ファイルの先頭に置く識別子
+HEADER = struct.Struct('<4sII') # (識別子, スロット数, エントリ数)
+RECORD = struct.Struct('<QQBB') # (黒のマスク, 白のマスク, 手番, 着手のマスのインデックス)
+
+def _build_transforms() -> Tuple[Tuple[int, ...], ...]:
+    """
+    盤面の8つの対称変換 (回転と鏡映) を、マスのインデックスの置換表として作る関数
+    """
+    n = SIZE - 1
+    maps = (
+        lambda x, y: (x, y), lambda x, y: (n - x, y), lambda x, y: (x, n - y), lambda x, y: (n - x, n - y),
+        lambda x, y: (y, x), lambda x, y: (n - y, x), lambda x, y: (y, n - x), lambda x, y: (n - y, n - x),
+    )
+    tables = []
+    for f in maps:
+        table = []
+        for i in range(CELLS):
+            tx, ty = f(i % SIZE, i // SIZE)
+            table.append(ty * SIZE + tx)
+        tables.append(tuple(table))
+    return tuple(tables)
+
+TRANSFORMS = _build_transforms() # 対称変換ごとの、マスのインデックスの置換表
+INVERSE = tuple( # 各対称変換の逆変換の番号
+    next(u for u, inv in enumerate(TRANSFORMS) if all(inv[t[i]] == i for i in range(CELLS)))
+    for t in TRANSFORMS
+)
+
+def transform(bits: int, t: int) -> int:
+    """
+    マスクに t 番目の対称変換を施す関数
+    """
+    table = TRANSFORMS[t]
+    out = 0
+    for i in iter_indices(bits):
+        out |= 1 << table[i]
+    return out
+
+def canonical(black: int, white: int) -> Tuple[int, int, int]:
+    """
+    8つの対称変換のうち、(黒, 白) のマスクが最小になるものを代表 (正規形) とする関数
+    戻り値: (正規形の黒のマスク, 正規形の白のマスク, 使った対称変換の番号)
+    """
+    best = None
+    for t in range(len(TRANSFORMS)):
+        key = (transform(black, t), transform(white, t), t)
+        if best is None or key[:2] < best[:2]:
+            best = key
+    return best
+
+def write_book(path: str, entries: Dict[BookKey, int]) -> None:
+    """
+    定石をファイルに書き出す関数
+    ファイルは開番地法のハッシュ表で、負荷率が 1/2 以下になるようにスロット数を決める
+    entries: 正規形の (黒, 白, 手番) から、正規形での着手のマスのインデックスへの辞書
+    """
+    slots = 1
+    while slots < 2 * len(entries):
+        slots <<= 1
+    table = bytearray(HEADER.size + RECORD.size * slots) # 空きスロットは黒も白も0 (盤面としてありえない)
+    HEADER.pack_into(table, 0, MAGIC, slots, len(entries))
+    mask = slots - 1
+    for (black, white, side), index in entries.items():
+        slot = mask_hash(black, white, side) & mask
+        while RECORD.unpack_from(table, HEADER.size + RECORD.size * slot)[:2] != (0, 0):
+            slot = (slot + 1) & mask
+        RECORD.pack_into(table, HEADER.size + RECORD.size * slot, black, white, side, index)
+    with open(path, 'wb') as f:
+        f.write(table)
+
+class OpeningBook:
+    """
+    初期局面からの定石をファイルから引くクラス
+    ファイルはメモリマップで開くので、起動時に全体を読み込まない
+    盤面は対称変換で正規化してからハッシュ表を引くので、1回の検索は O(1)
+    lookup: 1つの盤面の定石手を返すメソッド
+    lookup_info_set: 情報集合の各世界の定石手から1つを選ぶメソッド
+    """
+    def __init__(self, path: str):
+        """
+        path: write_book() (build_book()) で作ったファイルのパス
+        """
+        self._file = open(path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, slots, entries = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"Not an opening book: {path!r}")
+        self.mask = slots - 1
+        self.entries = entries
+
+    def __len__(self) -> int:
+        return self.entries
+
+    def close(self):
+        '''
+        メモリマップとファイルを閉じる関数
+        '''
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self) -> 'OpeningBook':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def probe(self, black: int, white: int, side: int) -> Optional[int]:
+        '''
+        正規形の盤面の定石手 (正規形でのマスのインデックス) を返す関数 (無ければ None)
+        '''
+        slot = mask_hash(black, white, side) & self.mask
+        while True:
+            b, w, s, index = RECORD.unpack_from(self._map, HEADER.size + RECORD.size * slot)
+            if b == 0 and w == 0:
+                return None
+            if b == black and w == white and s == side:
+                return index
+            slot = (slot + 1) & self.mask
+
+    def lookup(self, field, player_id: int) -> Optional[Move]:
+        '''
+        盤面の定石手を返す関数 (無ければ None)
+        field: board_key() を持つ盤面
+        player_id: 手番のプレイヤー
+        '''
+        black, white, t = canonical(*field.board_key())
+        index = self.probe(black, white, player_id)
+        if index is None:
+            return None
+        index = TRANSFORMS[INVERSE[t]][index] # 正規形での着手を元の向きに戻す
+        return index % SIZE, index // SIZE
+
+    def lookup_info_set(self, info, player_id: int) -> Optional[Move]:
+        '''
+        情報集合の各世界の定石手のうち、多重度の合計が最も大きいものを返す関数
+        すべての世界で打てる手だけを候補にする (どの世界も定石に無ければ None)
+        '''
+        votes: Dict[Move, int] = {}
+        for world, count in info.items():
+            move = self.lookup(world, player_id)
+            if move is not None:
+                votes[move] = votes.get(move, 0) + count
+        if not votes:
+            return None
+        common = info.partition(player_id).common
+        candidates = [move for move in sorted(votes) if move in common]
+        if not candidates:
+            return None
+        return max(candidates, key=lambda m: votes[m])
+
+def build_book(path: str, plies: int = 6, search_depth: int = 4) -> int:
+    """
+    初期局面から plies 手目までに現れるすべての局面について探索で着手を決め、定石ファイルを作る関数
+    対称な局面は正規形にまとめるので、1つの局面につき1回だけ探索する
+    path: 書き出すファイルのパス
+    plies: 定石に入れる手数
+    search_depth: 各局面での探索の深さ
+    戻り値: 定石に入れた局面の数
+    """
+    mid = SIZE // 2
+    white = (1 << ((mid - 1) * SIZE + mid - 1)) | (1 << (mid * SIZE + mid))
+    black = (1 << ((mid - 1) * SIZE + mid)) | (1 << (mid * SIZE + mid - 1))
+    b, w, _ = canonical(black, white)
+    frontier = {(b, w, 0)}
+    engine = NegamaxEngine(evaluate)
+    entries: Dict[BookKey, int] = {}
+    for _ in range(plies):
+        next_frontier = set()
+        for black, white, side in frontier:
+            masks = [black, white]
+            own, opp = masks[side], masks[1 - side]
+            moves = legal_mask(own, opp)
+            if not moves:
+                if legal_mask(opp, own):
+                    next_frontier.add((black, white, 1 - side)) # パスして相手の手番へ
+                continue
+            x, y = engine.search(own, opp, search_depth).move
+            entries[(black, white, side)] = y * SIZE + x
+            for index in iter_indices(moves):
+                f = flip_mask(own, opp, index)
+                masks[side], masks[1 - side] = own | f | (1 << index), opp & ~f
+                b, w, _ = canonical(masks[0], masks[1])
+                next_frontier.add((b, w, 1 - side))
+        frontier = next_frontier
+    write_book(path, entries)
+    return len(entries)
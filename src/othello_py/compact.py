@@ -0,0 +1,386 @@
+from typing import List, Optional, Tuple
+from .piece import Piece
+from .field import OthelloField, CORNER, EDGE
+
+SIZE = OthelloField.SIZE # 盤面のサイズ (6x6)
+CELLS = SIZE * SIZE # マスの数 (36)
+EMPTY, BLACK, WHITE = 0, 1, 2 # セルの値 (石の色は owner + 1 で表す)
+
+# セルの値を '0'/'1' の文字に置き換える変換表 (マスクの計算に使う)
+_BLACK_DIGITS = bytes(b'010' + b'0' * 253)
+_WHITE_DIGITS = bytes(b'001' + b'0' * 253)
+
+class BoardView:
+    """
+    CompactField の board[y][x] 形式の読み取り専用ビュー
+    既存の呼び出し側が移行するまでの互換用で、行を取り出すたびに Piece を作り直す
+    (Piece を書き換えても盤面には反映されない)
+    """
+    __slots__ = ('_cells',)
+
+    def __init__(self, cells: bytearray):
+        self._cells = cells
+
+    def __len__(self) -> int:
+        return SIZE
+
+    def __getitem__(self, y: int) -> Tuple[Optional[Piece], ...]:
+        row = self._cells[y * SIZE:(y + 1) * SIZE]
+        return tuple(None if c == EMPTY else Piece(c - 1) for c in row)
+
+    def __iter__(self):
+        for y in range(SIZE):
+            yield self[y]
+
+class CompactField:
+    """
+    1つの bytearray (SIZE*SIZE バイト) で盤面を表すOthelloの盤面クラス
+    OthelloField と同じ公開APIを持ち、Piece オブジェクトを作らないので
+    情報集合のように大量の盤面を持つ場合にメモリを節約できる
+    cells: マス (y * SIZE + x) ごとの値 (0=空, 1=黒, 2=白)
+    copy: バッファを1回コピーするだけで盤面を複製するメソッド
+    board: board[y][x] 形式の読み取り専用ビュー
+    """
+    __slots__ = ('cells', 'key', '_counts', '_history', '_moves')
+
+    SIZE = SIZE # 盤面のサイズ
+    ZOBRIST = OthelloField.ZOBRIST # マスごとの (黒, 白) の乱数
+    RAYS = OthelloField.RAYS # マスごとの8方向のインデックス列
+    REGIONS = OthelloField.REGIONS # マスごとの種類 (角・辺・それ以外)
+
+    def __init__(self):
+        """
+        盤面の初期化を行う
+        初期配置は OthelloField と同じ
+        """
+        self.cells = bytearray(CELLS)
+        mid = SIZE // 2
+        self.cells[(mid - 1) * SIZE + mid - 1] = WHITE
+        self.cells[mid * SIZE + mid] = WHITE
+        self.cells[(mid - 1) * SIZE + mid] = BLACK
+        self.cells[mid * SIZE + mid - 1] = BLACK
+        self._history: List[Tuple[int, bytes, List]] = [] # push() の記録 (着手したマス, ひっくり返したマス, 着手前の合法手のキャッシュ), パスは (-1, b'', None)
+        self.key = self._compute_key()
+        self._counts = self._compute_counts()
+        self._moves: List[Optional[List[Tuple[int,int]]]] = [None, None] # 色ごとの合法手のキャッシュ (None=未計算)
+
+    def _compute_key(self) -> int:
+        """
+        盤面全体からZobristハッシュ値を計算する
+        """
+        key = 0
+        for i, c in enumerate(self.cells):
+            if c != EMPTY:
+                key ^= self.ZOBRIST[i][c - 1]
+        return key
+
+    def _compute_counts(self) -> bytearray:
+        """
+        盤面全体から石の数を数える
+        戻り値: [全体の黒, 全体の白, 角の黒, 角の白, 辺の黒, 辺の白]
+        """
+        counts = bytearray(6)
+        for i, c in enumerate(self.cells):
+            if c != EMPTY:
+                self._tally(counts, i, c - 1, 1)
+        return counts
+
+    def _tally(self, counts: bytearray, index: int, owner: int, delta: int):
+        """
+        マス index にある owner の石の増減を counts に反映する
+        """
+        counts[owner] += delta
+        region = self.REGIONS[index]
+        if region:
+            counts[region * 2 + owner] += delta
+
+    @property
+    def board(self) -> BoardView:
+        """
+        board[y][x] 形式の読み取り専用のビュー
+        """
+        return BoardView(self.cells)
+
+    def board_key(self) -> Tuple[int, int]:
+        """
+        盤面を (黒のマスク, 白のマスク) で返す
+        """
+        # セルを '0'/'1' の列に変換し、逆順にして2進数として読む (インデックス0が最下位ビット)
+        black = int(self.cells.translate(_BLACK_DIGITS)[::-1], 2)
+        white = int(self.cells.translate(_WHITE_DIGITS)[::-1], 2)
+        return black, white
+
+    @classmethod
+    def from_board_key(cls, black: int, white: int) -> 'CompactField':
+        """
+        (黒のマスク, 白のマスク) から盤面を作る (board_key() の逆)
+        """
+        field = cls.__new__(cls)
+        field.cells = bytearray(
+            BLACK if black >> i & 1 else WHITE if white >> i & 1 else EMPTY for i in range(CELLS)
+        )
+        field._history = []
+        field.key = field._compute_key()
+        field._counts = field._compute_counts()
+        field._moves = [None, None]
+        return field
+
+    def __eq__(self, other) -> bool:
+        if not hasattr(other, 'board_key'):
+            return NotImplemented
+        return self.key == other.key and self.board_key() == other.board_key()
+
+    def __hash__(self) -> int:
+        return self.key
+
+    def check_in_bounds(self, x: int, y: int) -> bool:
+        """
+        指定された座標が盤面内にあるか判定するメソッド
+        """
+        return 0 <= x < SIZE and 0 <= y < SIZE
+
+    def owner_at(self, x: int, y: int) -> Optional[int]:
+        """
+        指定マスの石の所有者を返す (None=空)
+        """
+        c = self.cells[y * SIZE + x]
+        return None if c == EMPTY else c - 1
+
+    def set_square(self, x: int, y: int, owner: Optional[int]):
+        """
+        指定マスの状態を直接書き換える (None=空)
+        ひっくり返しは行わない
+        """
+        index = y * SIZE + x
+        old = self.cells[index]
+        if old != EMPTY:
+            self.key ^= self.ZOBRIST[index][old - 1]
+            self._tally(self._counts, index, old - 1, -1)
+        if owner is not None:
+            self.key ^= self.ZOBRIST[index][owner]
+            self._tally(self._counts, index, owner, 1)
+        self.cells[index] = EMPTY if owner is None else owner + 1
+        self._moves = [None, None] # 盤面が変わったので合法手のキャッシュを捨てる
+
+    def get_visible_board(self, player_id: int) -> List[List[Optional[int]]]:
+        '''
+        指定プレイヤーの視界に入る盤面を取得する関数
+        player_id: プレイヤーのID (0=黒, 1=白)
+        戻り値: 盤面の2次元リスト (None=空, player_id=そのプレイヤーの石)
+        '''
+        own = player_id + 1
+        cells = self.cells
+        return [
+            [player_id if cells[y * SIZE + x] == own else None for x in range(SIZE)]
+            for y in range(SIZE)
+        ]
+
+    def _flips(self, index: int, owner: int) -> List[int]:
+        '''
+        空きマス index に石を置いたときに、ひっくり返る石のインデックスを取得する関数
+        '''
+        cells = self.cells
+        own = owner + 1
+        flips: List[int] = []
+        for ray in self.RAYS[index]:
+            path: List[int] = []
+            for i in ray:
+                c = cells[i]
+                if c == EMPTY:
+                    break
+                if c == own:
+                    flips.extend(path)
+                    break
+                path.append(i)
+        return flips
+
+    def _captures(self, x: int, y: int, owner: int) -> List[Tuple[int,int]]:
+        '''
+        指定位置に石を置いたときに、ひっくり返る石の座標を取得する関数
+        '''
+        if not self.check_in_bounds(x, y) or self.cells[y * SIZE + x] != EMPTY:
+            return []
+        return [(i % SIZE, i // SIZE) for i in self._flips(y * SIZE + x, owner)]
+
+    def flip_mask(self, x: int, y: int, owner: int) -> int:
+        '''
+        指定位置に石を置いたときに、ひっくり返る石のマスク (y * SIZE + x のビット) を返す関数
+        盤面は書き換えない (着手できない場合は0)
+        '''
+        if not self.check_in_bounds(x, y) or self.cells[y * SIZE + x] != EMPTY:
+            return 0
+        mask = 0
+        for i in self._flips(y * SIZE + x, owner):
+            mask |= 1 << i
+        return mask
+
+    def _can_capture(self, index: int, owner: int) -> bool:
+        '''
+        空きマス index に石を置いたときに、1つでもひっくり返せるか判定する関数
+        '''
+        cells = self.cells
+        own = owner + 1
+        for ray in self.RAYS[index]:
+            c = cells[ray[0]]
+            if c == EMPTY or c == own:
+                continue
+            for i in ray[1:]:
+                c = cells[i]
+                if c == EMPTY:
+                    break
+                if c == own:
+                    return True
+        return False
+
+    def legal_moves(self, owner: int) -> List[Tuple[int,int]]:
+        '''
+        指定プレイヤーの合法手を取得する関数
+        順序は OthelloField と同じ (x が外側のループ)
+        結果は盤面が変わるまでキャッシュするので、返したリストは書き換えないこと
+        '''
+        cached = self._moves[owner]
+        if cached is not None:
+            return cached
+        cells = self.cells
+        moves = [
+            (x, y)
+            for x in range(SIZE) for y in range(SIZE)
+            if cells[y * SIZE + x] == EMPTY and self._can_capture(y * SIZE + x, owner)
+        ]
+        self._moves[owner] = moves
+        return moves
+
+    def _apply(self, x: int, y: int, owner: int) -> List[int]:
+        '''
+        石を置いてひっくり返し、ひっくり返した石のインデックスを返す関数
+        '''
+        if not self.check_in_bounds(x, y):
+            raise ValueError("Illegal move")
+        index = y * SIZE + x
+        flips = self._flips(index, owner) if self.cells[index] == EMPTY else []
+        if not flips:
+            raise ValueError("Illegal move")
+        cells = self.cells
+        z = self.ZOBRIST
+        regions = self.REGIONS
+        counts = self._counts
+        own = owner + 1
+        cells[index] = own
+        key = self.key ^ z[index][owner]
+        self._tally(counts, index, owner, 1)
+        for i in flips:
+            cells[i] = own
+            zk = z[i]
+            key ^= zk[0] ^ zk[1] # 色が入れ替わるので両方の乱数を反転する
+            region = regions[i]
+            if region:
+                counts[region * 2 + owner] += 1
+                counts[region * 2 + 1 - owner] -= 1
+        counts[owner] += len(flips)
+        counts[1 - owner] -= len(flips)
+        self.key = key
+        self._moves = [None, None] # 盤面が変わったので合法手のキャッシュを捨てる
+        return flips
+
+    def place(self, x: int, y: int, owner: int) -> int:
+        '''
+        石をひっくり返し、その数を返す関数
+        '''
+        return len(self._apply(x, y, owner))
+
+    def push(self, move: Optional[Tuple[int,int]], owner: int) -> int:
+        '''
+        着手を盤面に直接反映し、pop() で戻せるように記録する関数
+        move: 着手の座標 (None=パス)
+        戻り値: ひっくり返った石の数
+        '''
+        if move is None:
+            self._history.append((-1, b'', None))
+            return 0
+        x, y = move
+        moves = self._moves # pop() で戻すために着手前のキャッシュを取っておく
+        flips = self._apply(x, y, owner)
+        self._history.append((y * SIZE + x, bytes(flips), moves))
+        return len(flips)
+
+    def pop(self):
+        '''
+        直前の push() を取り消して盤面を元に戻す関数
+        '''
+        index, flips, moves = self._history.pop()
+        if index < 0:
+            return # パスなら盤面は変わっていない
+        cells = self.cells
+        z = self.ZOBRIST
+        regions = self.REGIONS
+        counts = self._counts
+        owner = cells[index] - 1 # 取り消す着手の手番
+        opp = 2 - owner # 相手のセルの値
+        key = self.key ^ z[index][owner]
+        self._tally(counts, index, owner, -1)
+        cells[index] = EMPTY
+        for i in flips:
+            cells[i] = opp # ひっくり返した石を元の色に戻す
+            zk = z[i]
+            key ^= zk[0] ^ zk[1]
+            region = regions[i]
+            if region:
+                counts[region * 2 + owner] -= 1
+                counts[region * 2 + 1 - owner] += 1
+        counts[owner] -= len(flips)
+        counts[1 - owner] += len(flips)
+        self.key = key
+        self._moves = moves # 着手前の盤面に戻ったので、合法手のキャッシュも戻す
+
+    def copy(self) -> 'CompactField':
+        '''
+        盤面のコピーを返す関数
+        バッファを1回コピーするだけなので軽い (push の記録はコピーしない)
+        '''
+        new_field = self.__class__.__new__(self.__class__)
+        new_field.cells = self.cells[:]
+        new_field.key = self.key
+        new_field._counts = self._counts[:]
+        new_field._history = []
+        new_field._moves = self._moves[:] # 合法手のリスト自体は書き換えないので共有してよい
+        return new_field
+
+    def get_legal_moves(self, owner: int):
+        """
+        legal_moves のエイリアスとして実装
+        指定プレイヤーの合法手を取得する
+        """
+        return self.legal_moves(owner)
+
+    def make_move(self, move: Tuple[int,int], owner: int) -> 'CompactField':
+        """
+        この手を打った後の新しい盤面を返す
+        """
+        new_field = self.copy()
+        x, y = move
+        new_field.place(x, y, owner)
+        return new_field
+
+    def is_game_over(self) -> bool:
+        """
+        両プレイヤーに合法手がなければゲーム終了とみなす
+        """
+        return not self.legal_moves(0) and not self.legal_moves(1)
+
+    def count_pieces(self, owner: int) -> int:
+        """
+        指定プレイヤーの石の数をカウントする
+        """
+        return self._counts[owner]
+
+    def count_corner_pieces(self, owner: int) -> int:
+        """
+        指定プレイヤーの角の石の数をカウントする
+        """
+        return self._counts[CORNER * 2 + owner]
+
+    def count_edge_pieces(self, owner: int) -> int:
+        """
+        指定プレイヤーの辺の石の数をカウントする (4隅は除外)
+        """
+        return self._counts[EDGE * 2 + owner]
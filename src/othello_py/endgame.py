@@ -0,0 +1,189 @@
+from typing import Dict, List, Optional, Tuple
+from .bitboard import SIZE, FULL, legal_mask, flip_mask, iter_indices
+
+Move = Tuple[int, int]
+ENDGAME_EMPTIES = 10 # この数以下の空きマスになったら読み切りに切り替える (既定値)
+ENDGAME_WORLDS = 64 # 情報集合の世界がこの数より多いときは読み切らない (世界ごとに読み切るので時間がかかる)
+SORT_EMPTIES = 6 # この数より空きマスが多いときだけ、相手の合法手の数で着手を並べ替える
+INF = SIZE * SIZE + 1 # 石差の絶対値より大きい値
+
+# 盤面を 3x3 の4つの区画に分けたマスク (偶奇による着手の並べ替えに使う)
+QUADRANTS = tuple(
+    sum(1 << (y * SIZE + x) for y in range(qy, qy + SIZE // 2) for x in range(qx, qx + SIZE // 2))
+    for qy in (0, SIZE // 2) for qx in (0, SIZE // 2)
+)
+
+def empties(field) -> int:
+    """
+    盤面の空きマスの数を返す関数
+    """
+    black, white = field.board_key()
+    return SIZE * SIZE - (black | white).bit_count()
+
+def _final(own: int, opp: int) -> int:
+    """
+    終局時の石差 (手番側 - 相手)
+    サーバの判定と同じく、空きマスはどちらにも数えない
+    """
+    return own.bit_count() - opp.bit_count()
+
+def _last1(own: int, opp: int, index: int) -> int:
+    """
+    空きマスが1つのときの石差 (手番側から見た値)
+    手番側が打てなければ相手が打ち、どちらも打てなければそのまま終局する
+    """
+    bit = 1 << index
+    f = flip_mask(own, opp, index)
+    if f:
+        return _final(own | f | bit, opp & ~f)
+    f = flip_mask(opp, own, index)
+    if f:
+        return _final(own & ~f, opp | f | bit)
+    return _final(own, opp)
+
+def _last2(own: int, opp: int, a: int, b: int, alpha: int, beta: int) -> int:
+    """
+    空きマスが2つのときの石差 (手番側から見た値)
+    合法手の生成をせずに、2つのマスを直接試す
+    """
+    best = -INF
+    for sq, other in ((a, b), (b, a)):
+        f = flip_mask(own, opp, sq)
+        if f:
+            v = -_last1(opp & ~f, own | f | (1 << sq), other)
+            if v > best:
+                best = v
+                if v >= beta:
+                    return v
+    if best > -INF:
+        return best
+    # 手番側はパス: 相手が打つ
+    best = INF
+    for sq, other in ((a, b), (b, a)):
+        f = flip_mask(opp, own, sq)
+        if f:
+            v = _last1(own & ~f, opp | f | (1 << sq), other)
+            if v < best:
+                best = v
+                if v <= alpha:
+                    return v
+    if best < INF:
+        return best
+    return _final(own, opp)
+
+def _ordered_moves(own: int, opp: int, moves: int, empty: int) -> List[Tuple[int, int]]:
+    """
+    着手を (マスのインデックス, ひっくり返る石のマスク) のリストで、良さそうな順に返す関数
+    空きマスが多いときは相手の合法手が少なくなる手から (速い手順優先, 着手可能数による並べ替え)
+    同じなら空きマスが奇数個の区画の手から (偶奇による並べ替え)
+    """
+    odd = 0
+    for mask in QUADRANTS:
+        if (empty & mask).bit_count() & 1:
+            odd |= mask
+    result = []
+    sort_mobility = empty.bit_count() > SORT_EMPTIES
+    for index in iter_indices(moves):
+        f = flip_mask(own, opp, index)
+        mobility = legal_mask(opp & ~f, own | f | (1 << index)).bit_count() if sort_mobility else 0
+        parity = 0 if odd >> index & 1 else 1
+        result.append((mobility, parity, index, f))
+    result.sort()
+    return [(index, f) for _, _, index, f in result]
+
+def negamax(own: int, opp: int, alpha: int = -INF, beta: int = INF, passed: bool = False) -> int:
+    """
+    盤面を最後まで読み切り、最善を尽くしたときの石差を返す関数 (αβ法によるネガマックス)
+    own: 手番側の石のマスク
+    opp: 相手の石のマスク
+    alpha, beta: 探索窓 (窓の外の値は正確ではなく、窓の端を超えたことだけが分かる)
+    passed: 直前の手がパスだったかどうか
+    戻り値: 手番側から見た石差
+    """
+    empty = ~(own | opp) & FULL
+    n = empty.bit_count()
+    if n == 0:
+        return _final(own, opp)
+    if n == 1:
+        return _last1(own, opp, empty.bit_length() - 1)
+    if n == 2:
+        a = (empty & -empty).bit_length() - 1
+        return _last2(own, opp, a, empty.bit_length() - 1, alpha, beta)
+    moves = legal_mask(own, opp)
+    if not moves:
+        if passed:
+            return _final(own, opp) # 両者とも打てないので終局
+        return -negamax(opp, own, -beta, -alpha, True)
+    best = -INF
+    for index, f in _ordered_moves(own, opp, moves, empty):
+        v = -negamax(opp & ~f, own | f | (1 << index), -beta, -alpha)
+        if v > best:
+            best = v
+            if v > alpha:
+                alpha = v
+                if alpha >= beta:
+                    break
+    return best
+
+def _masks(field, player_id: int) -> Tuple[int, int]:
+    """
+    盤面から (手番側のマスク, 相手のマスク) を取り出す
+    """
+    black, white = field.board_key()
+    return (black, white) if player_id == 0 else (white, black)
+
+def solve(field, player_id: int) -> int:
+    """
+    盤面を読み切り、player_id が手番のときの最善の石差を返す関数
+    field: board_key() を持つ盤面 (OthelloField, BitboardField, CompactField)
+    """
+    own, opp = _masks(field, player_id)
+    return negamax(own, opp)
+
+def move_scores(field, player_id: int) -> Dict[Move, int]:
+    """
+    player_id の各合法手について、打った後を読み切ったときの石差を返す関数
+    手ごとの正確な値が要るので、手の間では窓を狭めない
+    """
+    own, opp = _masks(field, player_id)
+    scores = {}
+    for index in iter_indices(legal_mask(own, opp)):
+        f = flip_mask(own, opp, index)
+        scores[(index % SIZE, index // SIZE)] = -negamax(opp & ~f, own | f | (1 << index))
+    return scores
+
+def best_move(field, player_id: int) -> Tuple[Optional[Move], int]:
+    """
+    盤面を読み切って最善手を選ぶ関数 (1つの世界用)
+    戻り値: (最善手 または None (打てる手が無い), その手の石差)
+    """
+    own, opp = _masks(field, player_id)
+    moves = legal_mask(own, opp)
+    if not moves:
+        return None, solve(field, player_id)
+    best, best_value = None, -INF
+    alpha = -INF
+    for index, f in _ordered_moves(own, opp, moves, ~(own | opp) & FULL):
+        v = -negamax(opp & ~f, own | f | (1 << index), -INF, -alpha)
+        if v > best_value:
+            best, best_value = (index % SIZE, index // SIZE), v
+            alpha = max(alpha, v)
+    return best, best_value
+
+def solve_info_set(info, player_id: int) -> Tuple[Optional[Move], float]:
+    """
+    情報集合のすべての世界を読み切り、石差の期待値 (多重度で重み付けした平均) が最大の手を選ぶ関数
+    候補はすべての世界で打てる手だけ (一部の世界でしか打てない手は不正手になりうる)
+    戻り値: (最善手 または None (共通の手が無い), その手の石差の期待値)
+    """
+    common = info.partition(player_id).common
+    if not common:
+        return None, 0.0
+    totals = {move: 0 for move in common}
+    for world, count in info.items():
+        scores = move_scores(world, player_id)
+        for move in common:
+            totals[move] += scores[move] * count
+    total = info.total
+    move = max(sorted(common), key=lambda m: totals[m])
+    return move, totals[move] / total
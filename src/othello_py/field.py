@@ -1,5 +1,5 @@
 from typing import List, Optional, Tuple
-import copy
+from .zobrist import make_keys
 
 class Piece:
     """
@@ -9,6 +9,48 @@ class Piece:
     def __init__(self, owner: int):
         self.owner = owner
 
+DIRECTIONS = ((-1,-1), (0,-1), (1,-1), (-1,0), (1,0), (-1,1), (0,1), (1,1)) # 8方向
+
+def build_rays(size: int) -> Tuple[Tuple[Tuple[int, ...], ...], ...]:
+    """
+    マスごと・方向ごとに、盤端までのマスのインデックスを並べた表を作る関数
+    size: 盤面のサイズ
+    戻り値: rays[y * size + x] が、8方向それぞれのインデックスのタプル (空の方向は含めない)
+    """
+    rays = []
+    for index in range(size * size):
+        y, x = divmod(index, size)
+        per_square = []
+        for dx, dy in DIRECTIONS:
+            ray = []
+            nx, ny = x + dx, y + dy
+            while 0 <= nx < size and 0 <= ny < size:
+                ray.append(ny * size + nx)
+                nx += dx; ny += dy
+            if len(ray) >= 2: # 挟むには相手の石と自分の石で最低2マス必要
+                per_square.append(tuple(ray))
+        rays.append(tuple(per_square))
+    return tuple(rays)
+
+def build_coords(size: int) -> Tuple[Tuple[int, int], ...]:
+    """
+    マスのインデックス (y * size + x) から座標 (x, y) への変換表を作る関数
+    """
+    return tuple((i % size, i // size) for i in range(size * size))
+
+CORNER, EDGE = 1, 2 # マスの種類 (0 はそれ以外)
+
+def build_regions(size: int) -> Tuple[int, ...]:
+    """
+    マスのインデックスごとに、角 (CORNER)・辺 (EDGE, 4隅は除外)・それ以外 (0) を表す表を作る関数
+    """
+    regions = []
+    for i in range(size * size):
+        y, x = divmod(i, size)
+        on_x, on_y = x in (0, size - 1), y in (0, size - 1)
+        regions.append(CORNER if on_x and on_y else EDGE if on_x or on_y else 0)
+    return tuple(regions)
+
 class OthelloField:
     """
     Othelloの盤面のクラス
@@ -18,11 +60,21 @@ class OthelloField:
     in_bounds: 座標が盤面内かどうかを判定するメソッド
     get_visible_board: プレイヤーの視界に入る盤面を取得するメソッド
     _captures: 指定位置に石を置いたときにひっくり返る石の座標を取得するメソッド
-    legal_moves: 指定プレイヤーの合法手を取得するメソッド
+    legal_moves: 指定プレイヤーの合法手を取得するメソッド (色ごとにキャッシュし、盤面が変わったら捨てる)
     place: 指定位置に石を置き、ひっくり返る石の数を返すメソッド
+    push: 着手を盤面に直接反映し、元に戻すための記録を積むメソッド
+    pop: 直前の push を取り消すメソッド
+    key: 盤面のZobristハッシュ値 (着手のたびに差分で更新する)
+    board_key: 盤面を (黒のマスク, 白のマスク) で表すメソッド
+    count_pieces, count_corner_pieces, count_edge_pieces: 石の数を返すメソッド
+    (石の数は着手のたびに差分で更新しているので、盤面を走査しない)
     """
 
     SIZE = 6 # 盤面のサイズ 
+    ZOBRIST = make_keys(SIZE * SIZE) # マス (y * SIZE + x) ごとの (黒, 白) の乱数
+    RAYS = build_rays(SIZE) # マスごとの8方向のインデックス列 (盤端の判定が不要になる)
+    COORDS = build_coords(SIZE) # インデックスから (x, y) への変換表
+    REGIONS = build_regions(SIZE) # インデックスごとのマスの種類 (角・辺・それ以外)
 
     def __init__(self):
         """
@@ -39,6 +91,79 @@ class OthelloField:
         self.board[mid][mid]     = Piece(1)
         self.board[mid-1][mid]   = Piece(0) # 黒
         self.board[mid][mid-1]   = Piece(0)
+        # push() で積まれる着手の記録 (x, y, ひっくり返した座標のリスト, 着手前の合法手のキャッシュ), パスは None
+        self._history: List[Optional[Tuple[int, int, List[Tuple[int,int]], List]]] = []
+        self.key = self._compute_key()
+        self._counts = self._compute_counts()
+        self._moves: List[Optional[List[Tuple[int,int]]]] = [None, None] # 色ごとの合法手のキャッシュ (None=未計算)
+
+    def _compute_counts(self) -> List[List[int]]:
+        """
+        盤面全体から石の数を数える
+        戻り値: [[全体の黒, 全体の白], [角の黒, 角の白], [辺の黒, 辺の白]]
+        """
+        counts = [[0, 0], [0, 0], [0, 0]]
+        for y in range(self.SIZE):
+            for x in range(self.SIZE):
+                p = self.board[y][x]
+                if p is not None:
+                    self._tally(counts, y * self.SIZE + x, p.owner, 1)
+        return counts
+
+    def _tally(self, counts: List[List[int]], index: int, owner: int, delta: int):
+        """
+        マス index にある owner の石の増減を counts に反映する
+        """
+        counts[0][owner] += delta
+        region = self.REGIONS[index]
+        if region:
+            counts[region][owner] += delta
+
+    def _compute_key(self) -> int:
+        """
+        盤面全体からZobristハッシュ値を計算する
+        """
+        key = 0
+        for y in range(self.SIZE):
+            for x in range(self.SIZE):
+                p = self.board[y][x]
+                if p is not None:
+                    key ^= self.ZOBRIST[y * self.SIZE + x][p.owner]
+        return key
+
+    def board_key(self) -> Tuple[int, int]:
+        """
+        盤面を (黒のマスク, 白のマスク) で返す
+        マス (x, y) はビット y * SIZE + x に対応する (BitboardField.bits と同じ)
+        """
+        masks = [0, 0]
+        for y in range(self.SIZE):
+            for x in range(self.SIZE):
+                p = self.board[y][x]
+                if p is not None:
+                    masks[p.owner] |= 1 << (y * self.SIZE + x)
+        return masks[0], masks[1]
+
+    @classmethod
+    def from_board_key(cls, black: int, white: int) -> 'OthelloField':
+        """
+        (黒のマスク, 白のマスク) から盤面を作る (board_key() の逆)
+        """
+        field = cls()
+        for y in range(cls.SIZE):
+            for x in range(cls.SIZE):
+                bit = 1 << (y * cls.SIZE + x)
+                field.set_square(x, y, 0 if black & bit else 1 if white & bit else None)
+        return field
+
+    def __eq__(self, other) -> bool:
+        if not hasattr(other, 'board_key'):
+            return NotImplemented
+        # キーが違えば盤面も違うので、マスクの比較はキーが一致したときだけ行う
+        return self.key == other.key and self.board_key() == other.board_key()
+
+    def __hash__(self) -> int:
+        return self.key
 
     def check_in_bounds(self, x: int, y: int) -> bool:
         """
@@ -46,6 +171,29 @@ class OthelloField:
         """
         return 0 <= x < self.SIZE and 0 <= y < self.SIZE
 
+    def owner_at(self, x: int, y: int) -> Optional[int]:
+        """
+        指定マスの石の所有者を返す (None=空)
+        """
+        p = self.board[y][x]
+        return None if p is None else p.owner
+
+    def set_square(self, x: int, y: int, owner: Optional[int]):
+        """
+        指定マスの状態を直接書き換える (None=空)
+        ひっくり返しは行わない
+        """
+        index = y * self.SIZE + x
+        old = self.board[y][x]
+        if old is not None:
+            self.key ^= self.ZOBRIST[index][old.owner]
+            self._tally(self._counts, index, old.owner, -1)
+        if owner is not None:
+            self.key ^= self.ZOBRIST[index][owner]
+            self._tally(self._counts, index, owner, 1)
+        self.board[y][x] = None if owner is None else Piece(owner)
+        self._moves = [None, None] # 盤面が変わったので合法手のキャッシュを捨てる
+
     def get_visible_board(self, player_id: int) -> List[List[Optional[int]]]:
         '''
         指定プレイヤーの司会に入る盤面を取得する関数
@@ -67,45 +215,170 @@ class OthelloField:
         if not self.check_in_bounds(x, y) or self.board[y][x] is not None:
             return [] # 盤面外または既に石が置かれている場合は空リストを返す
 
-        dirs = [(-1,-1), (0,-1), (1,-1), (-1,0), (1,0), (-1,1), (0,1), (1,1)] # 8方向
+        board = self.board
+        coords = self.COORDS
         flips: List[Tuple[int,int]] = []
-        for dx, dy in dirs:
+        for ray in self.RAYS[y * self.SIZE + x]: # 方向ごとに盤端までのマスを順に見る
             path: List[Tuple[int,int]] = []
-            nx, ny = x + dx, y + dy
-            while self.check_in_bounds(nx, ny) and self.board[ny][nx] is not None and self.board[ny][nx].owner != owner: 
-                # 条件としては、ひっくり返る石があるかつ、相手の石であること
+            for i in ray:
+                nx, ny = coords[i]
+                p = board[ny][nx]
+                if p is None:
+                    break # 空きマスに当たったらこの方向は挟めない
+                if p.owner == owner:
+                    # 最後に自分の石がある場合、ひっくり返る石の座標を flips に追加
+                    flips.extend(path)
+                    break
                 path.append((nx, ny)) # 相手の石の座標を記録
-                nx += dx; ny += dy
-            if path and self.check_in_bounds(nx, ny) and self.board[ny][nx] is not None and self.board[ny][nx].owner == owner:
-                # 最後に自分の石がある場合、ひっくり返る石の座標を追加
-                # ひっくり返る石の座標を flips に追加
-                # ここで nx, ny は自分の石の座標
-                flips.extend(path)
         return flips
 
+    def flip_mask(self, x: int, y: int, owner: int) -> int:
+        '''
+        指定位置に石を置いたときに、ひっくり返る石のマスク (y * SIZE + x のビット) を返す関数
+        盤面は書き換えない (着手できない場合は0)
+        '''
+        mask = 0
+        for fx, fy in self._captures(x, y, owner):
+            mask |= 1 << (fy * self.SIZE + fx)
+        return mask
+
+    def _can_capture(self, index: int, owner: int) -> bool:
+        '''
+        空きマス index に石を置いたときに、1つでもひっくり返せるか判定する関数
+        ひっくり返る石を集めずに、最初に見つかった時点で打ち切る
+        '''
+        board = self.board
+        coords = self.COORDS
+        for ray in self.RAYS[index]:
+            nx, ny = coords[ray[0]]
+            p = board[ny][nx]
+            if p is None or p.owner == owner:
+                continue # 隣が空きマスか自分の石なら挟めない
+            for i in ray[1:]:
+                nx, ny = coords[i]
+                p = board[ny][nx]
+                if p is None:
+                    break
+                if p.owner == owner:
+                    return True
+        return False
+
     def legal_moves(self, owner: int) -> List[Tuple[int,int]]:
         '''
         指定プレイヤーの合法手を取得する関数
+        結果は盤面が変わるまでキャッシュするので、返したリストは書き換えないこと
         '''
+        cached = self._moves[owner]
+        if cached is not None:
+            return cached
         legal_moves_list = []
-        for x in range(self.SIZE):
-            for y in range(self.SIZE):
-                if self.board[y][x] is None and self._captures(x, y, owner):
+        board = self.board
+        size = self.SIZE
+        for x in range(size):
+            for y in range(size):
+                if board[y][x] is None and self._can_capture(y * size + x, owner):
                     legal_moves_list.append((x, y))
+        self._moves[owner] = legal_moves_list
         return legal_moves_list
     
 
-    def place(self, x: int, y: int, owner: int) -> int:
+    def _apply(self, x: int, y: int, owner: int) -> List[Tuple[int,int]]:
         '''
-        石をひっくり返し、その数を返す関数
+        石を置いてひっくり返し、ひっくり返した石の座標を返す関数
         '''
         flips = self._captures(x, y, owner) # ひっくり返る石の座標を取得
         if not flips:
             raise ValueError("Illegal move")
         self.board[y][x] = Piece(owner)
+        z = self.ZOBRIST
+        regions = self.REGIONS
+        counts = self._counts
+        index = y * self.SIZE + x
+        key = self.key ^ z[index][owner]
+        self._tally(counts, index, owner, 1)
         for fx, fy in flips:
             self.board[fy][fx].owner = owner # ひっくり返る石のオーナーを変更
+            i = fy * self.SIZE + fx
+            zk = z[i]
+            key ^= zk[0] ^ zk[1] # 色が入れ替わるので両方の乱数を反転する
+            region = regions[i]
+            if region:
+                counts[region][owner] += 1
+                counts[region][1 - owner] -= 1
+        counts[0][owner] += len(flips)
+        counts[0][1 - owner] -= len(flips)
+        self.key = key
+        self._moves = [None, None] # 盤面が変わったので合法手のキャッシュを捨てる
+        return flips
+
+    def place(self, x: int, y: int, owner: int) -> int:
+        '''
+        石をひっくり返し、その数を返す関数
+        '''
+        return len(self._apply(x, y, owner))
+
+    def push(self, move: Optional[Tuple[int,int]], owner: int) -> int:
+        '''
+        着手を盤面に直接反映し、pop() で戻せるように記録する関数
+        盤面をコピーしないので、探索中は1つの盤面を使い回せる
+        move: 着手の座標 (None=パス)
+        戻り値: ひっくり返った石の数
+        '''
+        if move is None:
+            self._history.append(None)
+            return 0
+        x, y = move
+        moves = self._moves # pop() で戻すために着手前のキャッシュを取っておく
+        flips = self._apply(x, y, owner)
+        self._history.append((x, y, flips, moves))
         return len(flips)
+
+    def pop(self):
+        '''
+        直前の push() を取り消して盤面を元に戻す関数
+        '''
+        entry = self._history.pop()
+        if entry is None:
+            return # パスなら盤面は変わっていない
+        x, y, flips, moves = entry
+        z = self.ZOBRIST
+        regions = self.REGIONS
+        counts = self._counts
+        index = y * self.SIZE + x
+        owner = self.board[y][x].owner # 取り消す着手の手番
+        key = self.key ^ z[index][owner]
+        self._tally(counts, index, owner, -1)
+        self.board[y][x] = None
+        for fx, fy in flips:
+            p = self.board[fy][fx]
+            p.owner = 1 - owner # ひっくり返した石を元の色に戻す
+            i = fy * self.SIZE + fx
+            zk = z[i]
+            key ^= zk[0] ^ zk[1]
+            region = regions[i]
+            if region:
+                counts[region][owner] -= 1
+                counts[region][1 - owner] += 1
+        counts[0][owner] -= len(flips)
+        counts[0][1 - owner] += len(flips)
+        self.key = key
+        self._moves = moves # 着手前の盤面に戻ったので、合法手のキャッシュも戻す
+
+    def copy(self) -> 'OthelloField':
+        '''
+        盤面のコピーを返す関数
+        石は新しく作り直すので、元の盤面と共有しない (push の記録はコピーしない)
+        '''
+        new_field = self.__class__.__new__(self.__class__)
+        new_field.board = [
+            [None if p is None else Piece(p.owner) for p in row]
+            for row in self.board
+        ]
+        new_field._history = []
+        new_field.key = self.key
+        new_field._counts = [list(c) for c in self._counts]
+        new_field._moves = list(self._moves) # 合法手のリスト自体は書き換えないので共有してよい
+        return new_field
     
     def get_legal_moves(self, owner: int):
         """
@@ -117,9 +390,9 @@ class OthelloField:
     def make_move(self, move: Tuple[int,int], owner: int) -> 'OthelloField':
         """
         この手を打った後の新しい盤面を返す
-        盤面を丸ごとコピーして place() を実行する
+        盤面をコピーして place() を実行する
         """
-        new_field = copy.deepcopy(self)
+        new_field = self.copy()
         x, y = move
         new_field.place(x, y, owner)
         return new_field
@@ -136,12 +409,7 @@ class OthelloField:
         owner: 0=黒, 1=白
         戻り値: 石の数
         """
-        sum = 0
-        for row in self.board:
-            for piece in row:
-                if piece is not None and piece.owner == owner:
-                    sum += 1
-        return sum
+        return self._counts[0][owner]
     
     def count_corner_pieces(self, owner: int) -> int:
         """
@@ -149,8 +417,7 @@ class OthelloField:
         owner: 0=黒, 1=白
         戻り値: 角の石の数
         """
-        corners = [(0, 0), (0, self.SIZE - 1), (self.SIZE - 1, 0), (self.SIZE - 1, self.SIZE - 1)]
-        return sum(1 for x, y in corners if self.board[y][x] is not None and self.board[y][x].owner == owner)
+        return self._counts[CORNER][owner]
     
     def count_edge_pieces(self, owner: int) -> int:
         """
@@ -158,6 +425,4 @@ class OthelloField:
         owner: 0=黒, 1=白
         戻り値: 辺の石の数
         """
-        edges = [(x, 0) for x in range(1, self.SIZE-1)] + [(x, self.SIZE - 1) for x in range(1, self.SIZE-1)] + \
-                [(0, y) for y in range(1, self.SIZE - 1)] + [(self.SIZE - 1, y) for y in range(1, self.SIZE - 1)] # ただし4隅は除外
-        return sum(1 for x, y in edges if self.board[y][x] is not None and self.board[y][x].owner == owner)
+        return self._counts[EDGE][owner] # ただし4隅は除外
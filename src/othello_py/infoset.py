@@ -0,0 +1,249 @@
+import random
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
+from .bitboard import iter_indices
+from .zobrist import MASK64
+
+Move = Tuple[int, int]
+BoardKey = Tuple[int, int] # (黒のマスク, 白のマスク)
+
+class MovePartition(NamedTuple):
+    """
+    情報集合の世界を、指定プレイヤーの合法手ごとに分けた結果
+    common: すべての世界で打てる手の集合
+    union: いずれかの世界で打てる手の集合
+    worlds: 着手から、その手が打てる (世界, 多重度) のリストへの辞書
+    """
+    common: Set[Move]
+    union: Set[Move]
+    worlds: Dict[Move, List[Tuple[object, int]]]
+
+class InfoSet:
+    """
+    情報セットに関するクラス
+    矛盾がなく、その状態の可能性がある世界を集合で管理する
+    世界は盤面の値 (board_key) で管理するので、同じ盤面は追加した時点で1つにまとまる
+    まとまった回数は多重度として持ち、平均を取るときの重みに使う
+    max_worlds を指定すると世界の数に上限を設け、超えた分はリザーバサンプリングで一様に間引く
+    worlds: 世界 (盤面) のリスト
+    counts: 各世界の多重度のリスト (worlds と同じ順)
+    sampled: 上限のために世界を捨てたことがあるか (True なら本当の世界が含まれない可能性がある)
+    add: 世界を追加するメソッド (同じ盤面なら多重度を足す)
+    """
+    def __init__(self, worlds: Iterable = (), counts: Optional[Iterable[int]] = None,
+                 max_worlds: Optional[int] = None, rng: Optional[random.Random] = None):
+        """
+        worlds: 盤面 (board_key() を持つもの) の列
+        counts: 各盤面の多重度 (省略時はすべて1)
+        max_worlds: 世界の数の上限 (None なら上限なし)
+        rng: 間引きに使う乱数生成器 (省略時は種0で作る)
+        """
+        self._worlds: Dict[BoardKey, object] = {}
+        self._counts: Dict[BoardKey, int] = {}
+        self._list: Optional[List] = None # worlds のキャッシュ
+        self._slots: List[BoardKey] = [] # リザーバの各枠に入っている盤面のキー
+        self.max_worlds = max_worlds
+        self.rng = rng if rng is not None else random.Random(0)
+        self.seen = 0 # 追加しようとした異なる盤面の数
+        self._dropped: Set[BoardKey] = set() # リザーバサンプリングで捨てた盤面のキー (再び来ても数え直さない)
+        self.sampled = False
+        if counts is None:
+            for world in worlds:
+                self.add(world)
+        else:
+            for world, count in zip(worlds, counts):
+                self.add(world, count)
+
+    def add(self, world, count: int = 1) -> bool:
+        '''
+        世界を追加する関数
+        同じ盤面が既にあれば、新しい世界は捨てて多重度だけを足す
+        既に捨てた盤面は、異なる盤面から一様に選ぶために、数え直さずに捨てる
+        戻り値: 新しい盤面として追加されたら True
+        '''
+        k = world.board_key()
+        if k in self._counts:
+            self._counts[k] += count
+            return False
+        if k in self._dropped:
+            return False
+        self.seen += 1
+        if self.max_worlds is None or len(self._slots) < self.max_worlds:
+            self._slots.append(k)
+        else:
+            # 上限を超えたらリザーバサンプリング: これまでの盤面から一様に max_worlds 個を残す
+            self.sampled = True
+            j = self.rng.randrange(self.seen)
+            if j >= self.max_worlds:
+                self._dropped.add(k)
+                return False
+            old = self._slots[j]
+            self._dropped.add(old)
+            del self._worlds[old]
+            del self._counts[old]
+            self._slots[j] = k
+        self._worlds[k] = world
+        self._counts[k] = count
+        self._list = None
+        return True
+
+    def empty_like(self) -> 'InfoSet':
+        '''
+        上限と乱数生成器を引き継いだ空の情報集合を返す
+        '''
+        result = InfoSet(max_worlds=self.max_worlds, rng=self.rng)
+        result.sampled = self.sampled
+        return result
+
+    @property
+    def worlds(self) -> List:
+        '''
+        世界のリスト (重複なし)
+        '''
+        if self._list is None:
+            self._list = list(self._worlds.values())
+        return self._list
+
+    @property
+    def counts(self) -> List[int]:
+        '''
+        各世界の多重度のリスト (worlds と同じ順)
+        '''
+        return list(self._counts.values())
+
+    @property
+    def total(self) -> int:
+        '''
+        多重度の合計 (重複を含めた世界の数)
+        '''
+        return sum(self._counts.values())
+
+    def items(self) -> Iterator[Tuple[object, int]]:
+        '''
+        (世界, 多重度) の組を返すイテレータ
+        '''
+        return zip(self._worlds.values(), self._counts.values())
+
+    def __len__(self) -> int:
+        return len(self._worlds)
+
+    def __contains__(self, world) -> bool:
+        return world.board_key() in self._worlds
+
+    def key(self) -> int:
+        '''
+        情報集合のキーを返す
+        各世界のZobristキーを多重度で重み付けした和なので、世界の並び順には依らない
+        '''
+        return sum(world.key * count for world, count in self.items()) & MASK64
+
+    def filter(self, predicate) -> 'InfoSet':
+        '''
+        条件を満たす世界だけを、多重度を保ったまま残した新しい情報集合を返す
+        '''
+        result = self.empty_like()
+        for world, count in self.items():
+            if predicate(world):
+                result.add(world, count)
+        return result
+
+    def partition(self, player_id: int) -> MovePartition:
+        '''
+        各世界の合法手を1回ずつ求めて、共通の手・いずれかで打てる手・手ごとの世界の分割をまとめて返す関数
+        '''
+        by_move: Dict[Move, List[Tuple[object, int]]] = {}
+        for world, count in self.items():
+            for move in world.get_legal_moves(player_id):
+                by_move.setdefault(move, []).append((world, count))
+        n = len(self._worlds)
+        common = {move for move, entries in by_move.items() if len(entries) == n}
+        return MovePartition(common, set(by_move), by_move)
+
+    def possible_moves(self, player_id: int) -> Set[Move]:
+        '''
+        すべての世界において、指定プレイヤーが打てる合法手を取得する
+        '''
+        worlds = self.worlds
+        if not worlds:
+            return set()
+        common = set(worlds[0].get_legal_moves(player_id))
+        for world in worlds[1:]:
+            common &= set(world.get_legal_moves(player_id))
+        return common
+
+    def union_moves(self, player_id: int) -> Set[Move]:
+        '''
+        一つの世界において、指定プレイヤーが打てる合法手を取得する
+        '''
+        moves = set()
+        for world in self.worlds:
+            moves |= set(world.get_legal_moves(player_id))
+        return moves
+
+def _neighbors(size: int) -> Tuple[int, ...]:
+    """
+    マスごとに、周囲8マスのマスク (y * size + x のビット) を並べた表を作る関数
+    """
+    table = []
+    for i in range(size * size):
+        y, x = divmod(i, size)
+        table.append(sum(
+            1 << (ny * size + nx)
+            for ny in range(y - 1, y + 2) for nx in range(x - 1, x + 2)
+            if (nx, ny) != (x, y) and 0 <= nx < size and 0 <= ny < size
+        ))
+    return tuple(table)
+
+def sample_worlds(field_cls, own_mask: int, player_id: int, n_discs: int, n: int,
+                  rng: random.Random, max_worlds: Optional[int] = None,
+                  predicate: Optional[Callable[[object], bool]] = None, attempts: Optional[int] = None) -> InfoSet:
+    """
+    今の可視盤面に合う世界をランダムに作る関数 (ヒューリスティック)
+    サンプリングした情報集合が観測と矛盾したときに、作り直すために使う
+    自分の石の位置と盤上の石の総数だけを手がかりに、相手の石を置いていく
+    石は必ず既存の石の隣に置かれるので、中央の4マスから石がつながるように相手の石を並べる
+    これまでの FLIP_COUNT やひっくり返された石の履歴は再現しないので、
+    実際の対局では起こり得ない世界も含まれる (必要な条件は predicate で絞る)
+    field_cls: 盤面クラス
+    own_mask: 自分の石のマスク (y * SIZE + x のビット)
+    player_id: 自分のプレイヤーID
+    n_discs: 盤上の石の総数
+    n: 作る世界の数 (max_worlds がこれより小さければ、作った世界から一様に間引く)
+    rng: 乱数生成器
+    max_worlds: 返す情報集合の上限 (省略時は n)
+    predicate: 作った世界のうち、これを満たすものだけを残す (None なら全部残す)
+    attempts: 世界を作ってみる回数の上限 (省略時は 4 * n)
+    戻り値: 作った世界の情報集合 (sampled=True)
+    """
+    size = field_cls.SIZE
+    cells = size * size
+    neighbors = _neighbors(size)
+    mid = size // 2
+    center = sum(1 << i for i in ((mid - 1) * size + mid - 1, (mid - 1) * size + mid, mid * size + mid - 1, mid * size + mid))
+    n_opp = n_discs - own_mask.bit_count()
+    info = InfoSet(max_worlds=max_worlds or n, rng=rng)
+    info.sampled = True
+    for _ in range(attempts or 4 * n): # 重複した盤面や predicate を満たさない盤面は捨てられるので、多めに試す
+        if info.seen >= n:
+            break
+        opp = center & ~own_mask # 中央の4マスは必ず石があるので、自分の石でなければ相手の石
+        occupied = own_mask | opp
+        frontier = 0 # 石に隣接する空きマス (石を置けるマス)
+        for i in iter_indices(occupied):
+            frontier |= neighbors[i]
+        frontier &= ~occupied
+        count = opp.bit_count()
+        while count < n_opp and frontier:
+            i = rng.choice(list(iter_indices(frontier)))
+            opp |= 1 << i
+            occupied |= 1 << i
+            frontier = (frontier | neighbors[i]) & ~occupied # 置いた石の周りを加える
+            count += 1
+        if count != n_opp:
+            continue
+        world = field_cls()
+        for i in range(cells):
+            y, x = divmod(i, size)
+            world.set_square(x, y, player_id if own_mask >> i & 1 else 1 - player_id if opp >> i & 1 else None)
+        if predicate is None or predicate(world):
+            info.add(world)
+    return info
@@ -0,0 +1,263 @@
+import abc
+import random
+from typing import Optional, Set, Tuple
+from .player_base import Player
+from .compact import CompactField
+from .endgame import ENDGAME_EMPTIES, ENDGAME_WORLDS, empties, solve_info_set
+from .book import OpeningBook
+from .infoset import InfoSet, sample_worlds
+from .protocol import Command
+
+Move = Tuple[int, int]
+RESAMPLE_WORLDS = 256 # 情報集合を作り直すときの世界の数 (上限が無い場合)
+
+class InfoSetPlayer(Player):
+    """
+    情報集合 (相手の石の配置としてあり得る盤面の集合) を管理するプレイヤーの基底クラス
+    サーバから来る BOARD, FLIP_COUNT, ILLEGAL_COUNT を見て、自分の着手と相手の着手のたびに情報集合を更新する
+    このクラスを継承して、select_move() で着手を選ぶ
+    info_set: 現在の情報集合
+    turn: ターン数
+    opponent_moves: 直前の相手の着手として考えられる手の集合 (None=パス, 分からなければ空)
+    on_own_move, on_opponent_move: 着手が確定したときに呼ばれるメソッド (探索木の再利用などに使う)
+    solve_endgame: 終盤に情報集合を読み切って着手を選ぶメソッド
+    book_move: 序盤に定石から着手を選ぶメソッド
+    """
+    def __init__(self, max_worlds: Optional[int] = None, seed: int = 0, field_cls=CompactField,
+                 endgame_empties: int = ENDGAME_EMPTIES, book: Optional[OpeningBook] = None):
+        """
+        max_worlds: 情報集合の世界の数の上限 (None なら上限なし、超えた分は一様に間引く)
+        seed: 間引きと作り直しに使う乱数の種
+        field_cls: 世界の盤面クラス (情報集合は大量の世界を持つので、省メモリの CompactField を既定にする)
+        endgame_empties: 空きマスがこの数以下になったら読み切る (0なら読み切らない)
+        book: 定石 (None なら使わない)
+        """
+        super().__init__()
+        self.max_worlds = max_worlds
+        self.endgame_empties = endgame_empties
+        self.book = book
+        self.rng = random.Random(seed)
+        self.field_cls = field_cls
+        self.disc_count = 4 # 盤上の石の総数 (着手のたびに1つ増える)
+        self._needs_resample = False # 整合する世界が無くなり、次の BOARD で作り直すかどうか
+        self._rejected_moves: Set[Move] = set() # この手番で不正手とされた手 (作り直す世界でも打てないようにする)
+        self.info_set: Optional[InfoSet] = None # 情報集合を初期化する
+        self.just_moved = False # 最後の着手が自分の手かどうか
+        self._passed = False # 最後の行動が自分のパスかどうか
+        self._after_illegal = False # 不正手の後の盤面の再送を待っているかどうか
+        self._pending_move: Optional[Move] = None # 直前に送った手
+        self._info_snapshot: Optional[InfoSet] = None # 直前の情報集合のスナップショット
+        self.opponent_moves: Set[Optional[Move]] = set()
+        self.turn = 0 # ターン数を初期化
+
+    @abc.abstractmethod
+    def select_move(self) -> Optional[Move]:
+        """
+        現在の情報集合から着手を選ぶ関数
+        戻り値: 着手の座標 (None=パス)
+        """
+
+    def book_move(self) -> Optional[Move]:
+        """
+        定石に情報集合の世界があれば、その定石手を返す関数 (無ければ None)
+        """
+        if self.book is None:
+            return None
+        return self.book.lookup_info_set(self.info_set, self.player_id)
+
+    def solve_endgame(self) -> Optional[Move]:
+        """
+        空きマスが endgame_empties 以下なら、情報集合の全世界を読み切って石差の期待値が最大の手を返す関数
+        読み切らない場合 (空きマスが多い、世界が多すぎる、共通の合法手が無い) は None を返す
+        """
+        worlds = self.info_set.worlds
+        if not worlds or empties(worlds[0]) > self.endgame_empties or len(worlds) > ENDGAME_WORLDS:
+            return None
+        move, _ = solve_info_set(self.info_set, self.player_id)
+        return move
+
+    def on_own_move(self, move: Optional[Move]) -> None:
+        """
+        自分の着手 (None=パス) がサーバに受理されたときに呼ばれる関数
+        """
+
+    def on_opponent_move(self, moves: Set[Optional[Move]]) -> None:
+        """
+        相手の着手の後、情報集合を更新したときに呼ばれる関数
+        moves: 相手の着手として考えられる手の集合 (None=パス, 分からなければ空)
+        """
+
+    def action(self) -> str:
+        """
+        select_move() で選んだ着手をコマンドにして返す関数
+        """
+        if self.info_set is None:
+            self.info_set = self._initial_info_set() # 初期世界として、相手の石も含めた初期盤面を設定する
+
+        move = self.select_move()
+        if move is None:
+            self.just_moved = False
+            self._passed = True
+            return Command.PASSED.value
+
+        self._pending_move = move
+        self._info_snapshot = self.info_set # 現在の情報集合をスナップショットとして保存 (盤面は書き換えないので共有してよい)
+        return f"{Command.MOVE.value} {move[0]} {move[1]}"
+
+    def handle_message(self, msg: str) -> None:
+        """
+        サーバから来る BOARD, FLIP_COUNT, TURN_ENDなどのメッセージを受け取って
+        可視盤面自体の更新と、相手手を仮定して世界の更新を行う
+        """
+        parts = msg.split()
+        cmd = parts[0]
+
+        if cmd == Command.ILLEGAL_COUNT.value:
+            if self._pending_move is not None and self._info_snapshot is not None:
+                move = self._pending_move
+                self._rejected_moves.add(move)
+                legal_worlds = self._info_snapshot.filter(
+                    lambda world: move not in world.get_legal_moves(self.player_id)
+                )
+                self.info_set = legal_worlds if legal_worlds.worlds else self._info_snapshot
+                if not legal_worlds.worlds and self._info_snapshot.sampled:
+                    self._needs_resample = True # 間引いた集合から本当の世界が落ちたので、再送される盤面で作り直す
+            self._pending_move = self._info_snapshot = None # スナップショットをクリア
+            self._after_illegal = True # 続けて送られる盤面は打ち直し用なので、情報集合は更新しない
+            return
+
+        elif cmd == Command.BOARD.value:
+            super().handle_message(msg) # player_base.pyのhandle_messageを呼び出して盤面を更新
+            if self.info_set is None:
+                # 初回のBOARD受信時にのみInfoSetを初期生成する
+                self.info_set = self._initial_info_set() # 初期世界として、相手の石も含めた初期盤面を設定する
+                self.last_flip_count = 0
+            elif self._after_illegal:
+                self._after_illegal = False
+                if self._needs_resample:
+                    self._needs_resample = False
+                    self._resample() # 不正手とされた手が打てない世界だけで作り直す
+                return
+            else:
+                self._rejected_moves.clear() # 盤面が進んだので、不正手とされた手の記録は使わない
+                if self.just_moved:
+                    self.just_moved = False # 最後の着手が自分の手であった場合はフラグをリセットする
+                    self._pending_move = self._info_snapshot = None # スナップショットをクリア
+                    if self._needs_resample:
+                        self._needs_resample = False
+                        self._resample() # 着手後の可視盤面を使って情報集合を作り直す
+                elif self._passed:
+                    self._passed = False
+                    self._update_info_set() # パスでは盤面が変わらないので、可視盤面との整合性だけを取る
+                    self.on_own_move(None)
+                else:
+                    # 相手の手を仮定して情報集合を更新する
+                    self._update_info_set()
+                    self.on_opponent_move(self.opponent_moves)
+            self.turn += 1
+
+        elif cmd == Command.FLIP_COUNT.value:
+            self.last_flip_count = int(parts[1]) # 最後のひっくり返った石の数を更新
+            if self.last_flip_count > 0:
+                self.disc_count += 1 # パス以外の着手で石が1つ増える
+
+            if self._pending_move is not None and self.last_flip_count > 0:
+                move = self._pending_move
+                worlds = self.info_set.empty_like()
+                for world, count in self.info_set.items():
+                    if move in world.get_legal_moves(self.player_id):
+                        worlds.add(world.make_move(move, self.player_id), count)
+                if worlds.worlds:
+                    self.info_set = worlds
+                elif self.info_set.sampled:
+                    self._needs_resample = True # 間引いた集合から本当の世界が落ちたので、BOARD 受信後に作り直す
+                else:
+                    print("Warning: No valid worlds after flip count update.")
+                self._pending_move = self._info_snapshot = None # スナップショットをクリア
+                self.just_moved = True
+                self.on_own_move(move)
+
+            else:
+                # 最後の着手が自分の手でなかった場合は、情報集合を更新しない
+                self.just_moved = False
+            return
+
+        else:
+            super().handle_message(msg)
+
+    def _initial_info_set(self) -> InfoSet:
+        """
+        初期盤面だけを持つ情報集合を作る関数 (世界の数の上限を設定する)
+        """
+        return InfoSet([self.field_cls()], max_worlds=self.max_worlds, rng=self.rng)
+
+    def _resample(self) -> None:
+        """
+        今の可視盤面と石の総数に合う世界をランダムに作り直して情報集合を置き換える関数
+        間引いた情報集合が観測と矛盾したとき (本当の世界が間引かれたとき) に使う
+        この手番で不正手とされた手が打てる世界は作らない
+        """
+        rejected = self._rejected_moves
+        worlds = sample_worlds(self.field_cls, self.visible, self.player_id, self.disc_count,
+                               self.max_worlds or RESAMPLE_WORLDS, self.rng, self.max_worlds,
+                               lambda world: not rejected.intersection(world.get_legal_moves(self.player_id)),
+                               4 * RESAMPLE_WORLDS) # 上限が小さくても、条件で捨てる分を見込んで十分に試す
+        if worlds.worlds:
+            self.info_set = worlds
+        else:
+            print("Warning: Failed to resample worlds. Keeping current info set.")
+
+    def _update_info_set(self):
+        own = self.visible # 観測した自分の石のマスク
+        flip_count = self.last_flip_count
+        unchanged = lambda world: world.board_key()[self.player_id] == own
+        self.opponent_moves = set()
+
+        if flip_count == 0:
+            # パスは合法手の有無に依らず起こり得るので、可視盤面の不変性で整合性を取る
+            self.opponent_moves = {None}
+            new_worlds = self.info_set.filter(unchanged)
+            if new_worlds.worlds:
+                self.info_set = new_worlds
+            elif self.info_set.sampled:
+                self._resample() # 間引いた集合が矛盾したので作り直す
+            # 一致が無ければ、古い集合を保持（破綻防止）
+            return
+
+        # 相手の手でひっくり返るのは自分の石だけなので、盤面の差分の lost がひっくり返された石そのもの
+        # 手の前の世界の自分の石は own | lost と一致し、相手の手はちょうど lost をひっくり返す
+        # 安い判定 (自分の石のマスク、ひっくり返る石のマスク) を先に行い、残った候補だけを盤面に適用する
+        # 異なる相手の手から同じ盤面になった世界は、多重度を足して1つにまとめる
+        opp = 1 - self.player_id
+        lost = self.lost
+        before = own | lost # 相手の手の前の自分の石
+        new_worlds = self.info_set.empty_like()
+        if self.gained or lost.bit_count() != flip_count:
+            items = [] # 相手の手で自分の石が増えることや、ひっくり返った数が合わないことは無いので、どの世界も整合しない
+        else:
+            items = self.info_set.items()
+        for world, count in items:
+            if world.board_key()[self.player_id] != before:
+                continue # 手の前の自分の石が観測と合わない
+            for move in world.get_legal_moves(opp):
+                if world.flip_mask(move[0], move[1], opp) != lost:
+                    continue # ひっくり返る石が観測と合わない手は盤面を作らずに捨てる
+                self.opponent_moves.add(move)
+                world.push(move, opp)
+                if world in new_worlds:
+                    new_worlds.add(world, count) # 既にある盤面なら多重度だけを足す (コピーは不要)
+                else:
+                    new_worlds.add(world.copy(), count) # 整合する世界だけをコピーして残す
+                world.pop()
+
+        if new_worlds.worlds:
+            self.info_set = new_worlds
+        elif self.info_set.sampled:
+            self._resample() # 間引いた集合が矛盾したので作り直す
+        else:
+            # 整合性が取れない場合は、現在の情報集合を保持
+            new_worlds = self.info_set.filter(unchanged)
+            if new_worlds.worlds:
+                self.info_set = new_worlds
+            else:
+                print("Warning: No matching worlds found after opponent's move. Keeping current info set.")
@@ -0,0 +1,207 @@
+import math
+import threading
+import time
+from itertools import accumulate
+from typing import Dict, Optional, Set, Tuple
+from .compact import CompactField
+from .endgame import ENDGAME_EMPTIES
+from .book import OpeningBook
+from .infoset_player import InfoSetPlayer
+
+Move = Tuple[int, int]
+
+class ISMCTSNode:
+    """
+    情報集合モンテカルロ木探索 (ISMCTS) の木のノード
+    木は世界ごとではなく、着手の列ごとに1つ作る (どの世界で辿っても同じノードを共有する)
+    move: このノードに至る着手 (None=パス, 根では None)
+    player: move を打ったプレイヤー (根では None)
+    visits: 訪問回数
+    reward: player から見た報酬の合計 (勝ち=1, 引き分け=0.5, 負け=0)
+    avail: 親を訪れたときに、この着手が打てた回数 (UCB の計算に使う)
+    """
+    __slots__ = ('move', 'player', 'parent', 'children', 'visits', 'reward', 'avail')
+
+    def __init__(self, move: Optional[Move] = None, player: Optional[int] = None, parent: Optional['ISMCTSNode'] = None):
+        self.move = move
+        self.player = player
+        self.parent = parent
+        self.children: Dict[Optional[Move], 'ISMCTSNode'] = {}
+        self.visits = 0
+        self.reward = 0.0
+        self.avail = 0
+
+    def ucb(self, exploration: float) -> float:
+        '''
+        打てた回数を親の訪問回数の代わりに使った UCB1 の値
+        '''
+        return self.reward / self.visits + exploration * math.sqrt(math.log(self.avail) / self.visits)
+
+    def detach(self) -> 'ISMCTSNode':
+        '''
+        親から切り離して、新しい根として返す
+        '''
+        self.parent = None
+        return self
+
+class ISMCTSPlayer(InfoSetPlayer):
+    """
+    情報集合モンテカルロ木探索 (Single-Observer ISMCTS) で着手を選ぶプレイヤークラス
+    1回の反復ごとに情報集合から世界を1つ選び (多重度で重み付け)、その世界で選択・展開・プレイアウト・逆伝播を行う
+    反復回数か制限時間のどちらかに達したら探索を打ち切る (いつ止めてもその時点の最善手を返せる)
+    確定した着手に対応する部分木は次のターンに引き継ぐ
+    ponder=True なら相手の手番の間も同じ木で反復を続け、相手の着手が1つに絞れたときにその部分木を引き継ぐ
+    iterations: 1手あたりの反復回数の上限
+    time_limit: 1手あたりの制限時間 (秒, None なら反復回数だけで止める)
+    exploration: UCB の探索項の係数
+    """
+    def __init__(self, iterations: int = 1000, time_limit: Optional[float] = None, exploration: float = 0.7,
+                 max_worlds: Optional[int] = None, seed: int = 0, field_cls=CompactField,
+                 endgame_empties: int = ENDGAME_EMPTIES, book: Optional[OpeningBook] = None,
+                 ponder: bool = False):
+        """
+        iterations: 1手あたりの反復回数の上限
+        time_limit: 1手あたりの制限時間 (秒, None なら反復回数だけで止める)
+        exploration: UCB の探索項の係数
+        max_worlds: 情報集合の世界の数の上限 (None なら上限なし)
+        seed: 世界の選択とプレイアウトに使う乱数の種
+        field_cls: 世界の盤面クラス
+        endgame_empties: 空きマスがこの数以下になったら木探索をやめて読み切る (0なら読み切らない)
+        book: 定石 (None なら使わない)
+        ponder: 相手の手番の間に先読みするかどうか
+        """
+        super().__init__(max_worlds, seed, field_cls, endgame_empties, book)
+        self.ponder_enabled = ponder
+        self.iterations = iterations
+        self.time_limit = time_limit
+        self.exploration = exploration
+        self.root: Optional[ISMCTSNode] = None # 探索木の根 (ターンをまたいで引き継ぐ)
+        self.last_iterations = 0 # 直前の探索で行った反復回数
+        self.ponder_iterations = 0 # 直前の先読みで行った反復回数
+
+    def name(self) -> str:
+        return "ISMCTSPlayer"
+
+    def select_move(self) -> Optional[Move]:
+        """
+        ISMCTS で探索し、根で最も多く訪れた着手を選ぶ関数
+        序盤は定石、終盤は読み切りの結果を使う
+        """
+        move = self.book_move() or self.solve_endgame()
+        if move is not None:
+            self.root = None # 定石や読み切りでは木を作らない
+            return move
+        if self.root is None:
+            self.root = ISMCTSNode()
+        worlds = self.info_set.worlds
+        cum_weights = list(accumulate(self.info_set.counts))
+        deadline = None if self.time_limit is None else time.monotonic() + self.time_limit
+        n = 0
+        while n < self.iterations:
+            if deadline is not None and time.monotonic() > deadline:
+                break
+            world = self.rng.choices(worlds, cum_weights=cum_weights)[0] # 世界を1つ決める (determinization)
+            self._iterate(world.copy())
+            n += 1
+        self.last_iterations = n
+
+        # 不正手と分かって情報集合から消えた手は選ばない
+        union = self.info_set.partition(self.player_id).union
+        candidates = [c for c in self.root.children.values() if c.move is None or c.move in union]
+        if not candidates:
+            return None
+        return max(candidates, key=lambda c: c.visits).move
+
+    def ponder(self, stop: threading.Event) -> None:
+        """
+        相手の手番の間、相手が打つ局面を根として反復を続ける関数
+        相手の着手が1つに絞れれば、on_opponent_move() でその部分木が次の根になる
+        """
+        self.ponder_iterations = 0
+        if self.info_set is None or not self.info_set.worlds:
+            return
+        if self.root is None:
+            self.root = ISMCTSNode()
+        worlds = self.info_set.worlds
+        cum_weights = list(accumulate(self.info_set.counts))
+        while not stop.is_set():
+            world = self.rng.choices(worlds, cum_weights=cum_weights)[0]
+            self._iterate(world.copy(), 1 - self.player_id)
+            self.ponder_iterations += 1
+
+    def _iterate(self, state, player: Optional[int] = None) -> None:
+        """
+        決めた世界 state で1回の反復 (選択・展開・プレイアウト・逆伝播) を行う関数
+        state は書き換えるので、コピーを渡すこと
+        player: 根で手番のプレイヤー (None なら自分)
+        """
+        rng = self.rng
+        node = self.root
+        if player is None:
+            player = self.player_id
+
+        # 選択と展開: この世界で打てる手の子だけを候補にして木を下る
+        while True:
+            moves = state.legal_moves(player)
+            if not moves:
+                if not state.legal_moves(1 - player):
+                    break # 終局
+                moves = [None] # 打てる手が無ければパスだけ
+            untried = []
+            legal_children = []
+            for move in moves:
+                child = node.children.get(move)
+                if child is None:
+                    untried.append(move)
+                else:
+                    child.avail += 1
+                    legal_children.append(child)
+            if untried:
+                move = rng.choice(untried)
+                child = node.children[move] = ISMCTSNode(move, player, node)
+                child.avail = 1
+                node = child
+                if move is not None:
+                    state.place(move[0], move[1], player)
+                player = 1 - player
+                break
+            node = max(legal_children, key=lambda c: c.ucb(self.exploration))
+            if node.move is not None:
+                state.place(node.move[0], node.move[1], player)
+            player = 1 - player
+
+        # プレイアウト: 終局までランダムに打つ
+        while True:
+            moves = state.legal_moves(player)
+            if moves:
+                x, y = rng.choice(moves)
+                state.place(x, y, player)
+            elif not state.legal_moves(1 - player):
+                break
+            player = 1 - player
+
+        # 逆伝播: 各ノードの着手を打ったプレイヤーから見た勝敗を足す
+        diff = state.count_pieces(0) - state.count_pieces(1)
+        winner = 0 if diff > 0 else 1 if diff < 0 else None
+        while node is not None:
+            node.visits += 1
+            if node.player is not None:
+                node.reward += 0.5 if winner is None else 1.0 if winner == node.player else 0.0
+            node = node.parent
+
+    def on_own_move(self, move: Optional[Move]) -> None:
+        """
+        自分の着手の部分木を次の根にする
+        """
+        child = self.root.children.get(move) if self.root is not None else None
+        self.root = child.detach() if child is not None else None
+
+    def on_opponent_move(self, moves: Set[Optional[Move]]) -> None:
+        """
+        相手の着手が1つに絞れたときだけ、その部分木を次の根にする
+        (候補が複数あるときは、どの部分木の統計も本当の局面のものとは言えないので作り直す)
+        """
+        child = None
+        if self.root is not None and len(moves) == 1:
+            child = self.root.children.get(next(iter(moves)))
+        self.root = child.detach() if child is not None else None
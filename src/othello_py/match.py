@@ -0,0 +1,162 @@
+import random
+import time
+from typing import Callable, List, NamedTuple, Optional, Tuple
+from .field import OthelloField
+from .player_base import Player
+from .protocol import Command, Protocol, compact_move, parse_board
+from .server import TimeControl, game_steps
+
+OUTCOMES = (Protocol.you_win, Protocol.you_lose, Protocol.draw)
+
+class MatchResult(NamedTuple):
+    """
+    1局の結果
+    winner: 勝ったプレイヤーのID (引き分け、または決着前に終わった場合は None)
+    outcomes: プレイヤーごとに通知された結果 (you win / you lose / draw, 通知が無ければ None)
+    discs: プレイヤーごとの、最後に見えた自分の石の数
+    time_used: プレイヤーごとの使った時間 (秒)
+    names: プレイヤーごとの名前
+    """
+    winner: Optional[int]
+    outcomes: Tuple[Optional[str], Optional[str]]
+    discs: Tuple[int, int]
+    time_used: Tuple[float, float]
+    names: Tuple[str, str]
+
+class _Client:
+    """
+    play_game() のクライアント側の処理を、ソケットを使わずに行うクラス
+    サーバからの1行を受け取り、送り返す行を返す
+    """
+    def __init__(self, player: Player, field_cls, protocol: str = "hex"):
+        self.player = player
+        self.field_cls = field_cls
+        self.protocol = protocol
+        self.compact = False # 着手をマスの番号で送るかどうか
+        self.named = False # NAME を送ったかどうか
+        self.player_id: Optional[int] = None
+        self.initialized = False # 最初の BOARD を受け取ったかどうか
+        self.outcome: Optional[str] = None
+        self.discs = 0
+        self.done = False # play_game() ならループを抜けているかどうか
+
+    def feed(self, msg: str) -> List[str]:
+        '''
+        サーバからの1行を処理する関数
+        戻り値: サーバへ送り返す行のリスト
+        '''
+        if self.done:
+            return []
+        player = self.player
+        cmd = msg.split()[0]
+        if self.player_id is None: # IDを受信する
+            if cmd != Command.ID.value:
+                raise RuntimeError(f"Expected ID, got {msg!r}")
+            self.player_id = int(msg.split()[1])
+            return []
+        if not self.initialized: # 挨拶の後、通信方式を選んで名前を通知し、盤面初期化を待つ
+            replies = []
+            if cmd == Command.PROTOCOL.value and not self.named:
+                if self.protocol != "text" and self.protocol in msg.split()[1:]:
+                    replies.append(f"{Command.PROTOCOL.value} {self.protocol}")
+                    self.compact = True
+            if cmd in (Command.PROTOCOL.value, Command.BOARD.value) and not self.named:
+                replies.append(f"{Command.NAME.value} {player.name()}")
+                self.named = True
+            if cmd == Command.BOARD.value:
+                self.discs = parse_board(msg, self.player_id).bit_count()
+                player.initialize(self.field_cls(), self.player_id)
+                player.handle_message(msg)
+                self.initialized = True
+            return replies
+
+        if msg in OUTCOMES:
+            self.outcome = msg
+            self.done = True
+            return []
+        if cmd == Command.BOARD.value:
+            self.discs = parse_board(msg, self.player_id).bit_count()
+        if cmd == Command.ILLEGAL_COUNT.value:
+            parts = msg.split()
+            player.illegal_count = int(parts[1])
+            player.opponent_illegal_count = int(parts[2])
+        player.handle_message(msg)
+        if msg == "your turn":
+            move = player.action()
+            return [compact_move(move) if self.compact else move]
+        if cmd == Command.GAME_OVER.value:
+            self.done = True
+        return []
+
+def run_match(p0: Player, p1: Player, seed: Optional[int] = None, *, field_cls=OthelloField,
+              player_field_cls=OthelloField, time_control: Optional[TimeControl] = None,
+              protocol: str = "hex") -> MatchResult:
+    '''
+    2つのプレイヤーを、ソケットを使わずに同じプロセスの中で対局させる関数
+    サーバの規則 (game_steps) とクライアントの処理 (play_game) は通常の対局と同じで、
+    プレイヤーが受け取るメッセージの順番も同じ
+    p0, p1: 黒 (ID 0) と白 (ID 1) のプレイヤー (対局ごとに新しいインスタンスを渡すこと)
+    seed: 対局の乱数の種 (None なら設定しない)
+          random モジュールと、各プレイヤーの乱数 (reseed() で seed * 2 + ID) を設定し直すので、
+          持ち時間や時間制限つきの探索、先読みを使わなければ同じ seed で同じ対局になる
+    field_cls: サーバの盤面クラス
+    player_field_cls: プレイヤーに渡す盤面クラス
+    time_control: 持ち時間 (着手の途中では止められないので、時間切れは着手を返した後に判定する)
+    protocol: プレイヤーが選ぶ通信方式 ("text" または "hex")
+    '''
+    if seed is not None:
+        random.seed(seed)
+        p0.reseed(seed * 2)
+        p1.reseed(seed * 2 + 1)
+    clients = [_Client(p0, player_field_cls, protocol), _Client(p1, player_field_cls, protocol)]
+    replies: List[List[str]] = [[], []]
+    spent = [0.0, 0.0] # 直前の読み込みから後に、各プレイヤーが処理に使った時間
+    used = (0.0, 0.0)
+    steps = game_steps(field_cls, time_control)
+    step = next(steps)
+    while True:
+        for pid, lines in enumerate(step.out): # 各プレイヤーへメッセージを渡す
+            client = clients[pid]
+            for line in lines:
+                if line.startswith(Command.TIME_USED.value):
+                    parts = line.split()
+                    if pid == 0:
+                        used = (float(parts[1]), float(parts[2]))
+                start = time.monotonic()
+                replies[pid].extend(client.feed(line))
+                spent[pid] += time.monotonic() - start
+        if step.read is None:
+            break
+        pid = step.read
+        line = replies[pid].pop(0) if replies[pid] else "" # 返事が無ければ切断とみなす
+        elapsed, spent[pid] = spent[pid], 0.0
+        try:
+            step = steps.send((line, elapsed))
+        except StopIteration:
+            break
+
+    outcomes = (clients[0].outcome, clients[1].outcome)
+    winner = None
+    for pid in range(2):
+        if outcomes[pid] == Protocol.you_win and outcomes[1 - pid] != Protocol.you_win:
+            winner = pid
+    return MatchResult(winner, outcomes, (clients[0].discs, clients[1].discs), used, (p0.name(), p1.name()))
+
+def run_matches(make_p0: Callable[[], Player], make_p1: Callable[[], Player], games: int, seed: int = 0, *,
+                swap: bool = True, field_cls=OthelloField, player_field_cls=OthelloField,
+                time_control: Optional[TimeControl] = None) -> List[MatchResult]:
+    '''
+    2つのプレイヤーを続けて何局も対局させる関数
+    make_p0, make_p1: プレイヤーを作る関数 (対局ごとに新しいインスタンスを作る)
+    games: 対局数
+    seed: 最初の対局の乱数の種 (i 局目は seed + i)
+    swap: True なら1局ごとに先手と後手を入れ替える (結果の names と winner は実際の手番のもの)
+    '''
+    results = []
+    for i in range(games):
+        players = [make_p0(), make_p1()]
+        if swap and i % 2 == 1:
+            players.reverse()
+        results.append(run_match(players[0], players[1], seed + i, field_cls=field_cls,
+                                 player_field_cls=player_field_cls, time_control=time_control))
+    return results
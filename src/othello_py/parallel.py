@@ -0,0 +1,65 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterable, List, Optional, Tuple
+from .infoset import InfoSet, BoardKey
+
+PackedInfoSet = List[Tuple[BoardKey, int]] # ((黒のマスク, 白のマスク), 多重度) のリスト
+
+def pack_info_set(info: InfoSet) -> PackedInfoSet:
+    """
+    情報集合を、プロセス間で送りやすい (board_key, 多重度) の組のリストに変換する関数
+    盤面オブジェクトをそのまま pickle するより小さく、速い
+    """
+    return [(world.board_key(), count) for world, count in info.items()]
+
+def unpack_info_set(packed: PackedInfoSet, field_cls) -> InfoSet:
+    """
+    pack_info_set() で変換したリストから情報集合を作り直す関数
+    field_cls: 盤面クラス (from_board_key() を持つもの)
+    """
+    info = InfoSet()
+    for (black, white), count in packed:
+        info.add(field_cls.from_board_key(black, white), count)
+    return info
+
+class ParallelSearch:
+    """
+    探索をプロセスプールで並列に実行するためのクラス
+    ワーカープロセスは最初の map() で起動し、shutdown() するまでターンをまたいで使い回す
+    (ワーカー側のモジュール変数に置いた置換表なども次のターンに引き継がれる)
+    max_workers: ワーカープロセスの数 (None なら CPU のコア数)
+    map: タスクのリストを並列に実行し、結果を同じ順で返すメソッド
+    """
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        '''
+        ワーカープロセスのプール (必要になったときに起動する)
+        '''
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def map(self, fn: Callable, tasks: Iterable) -> List:
+        '''
+        各タスクに fn を適用した結果を、タスクと同じ順のリストで返す関数
+        fn: モジュールの最上位で定義した (pickle できる) 関数
+        tasks: fn に渡す引数 (1つ) の列
+        '''
+        return list(self.executor.map(fn, tasks))
+
+    def shutdown(self):
+        '''
+        ワーカープロセスを終了する関数
+        '''
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self) -> 'ParallelSearch':
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
@@ -1,16 +1,20 @@
 import abc
+import random
 import socket
+import threading
+from typing import Optional, Set, Tuple
 from .piece import Piece
 from .field import OthelloField as Field
-from .protocol import Command, Protocol
+from .protocol import Command, LineChannel, Protocol, compact_move, parse_board
 
-def play_game(host: str, port: int, player: 'Player'):
+def play_game(host: str, port: int, player: 'Player', field_cls=Field, protocol: str = "hex"):
     '''
     プレイヤーとサーバを接続して対局する関数
+    field_cls: プレイヤーが持つ盤面クラス (OthelloField または BitboardField)
+    protocol: サーバが提案していれば使う通信方式 ("hex" なら盤面を16進数のマスク、着手をマスの番号で送受信する)
+              提案しない古いサーバとは従来の方式 (text) で対局する
     '''
-    with socket.create_connection((host, port)) as sock: # サーバに接続
-        conn = sock.makefile(mode='rw', buffering=1, encoding='utf-8') # テキストモードで読み書きするファイルオブジェクトを作
-                                                                       # 文字化エンコーディングはUTF-8
+    with LineChannel(socket.create_connection((host, port))) as conn: # サーバに接続 (読み込みと書き込みを別々にバッファする)
 
         # IDを受信する
         parts = conn.readline().strip().split() # サーバからの最初の行を読み込み、空白で分割
@@ -20,27 +24,35 @@ def play_game(host: str, port: int, player: 'Player'):
 
         # 挨拶をする
         print(conn.readline().strip()) # サーバからの挨拶を読み込み、表示
+        # 通信方式の提案があれば、名前の前に方式を選ぶ (古いサーバは提案せずに盤面を送ってくる)
+        l = conn.readline()
+        compact = False # 着手をマスの番号で送るかどうか
+        if l.startswith(Command.PROTOCOL.value):
+            if protocol != "text" and protocol in l.split()[1:]:
+                conn.write(f"{Command.PROTOCOL.value} {protocol}\n")
+                compact = True
+            l = conn.readline()
         # 自分の名前をサーバへ通知
-        print(f"{Command.NAME.value} {player.name()}", file=conn)
+        conn.write(f"{Command.NAME.value} {player.name()}\n")
         conn.flush()
 
         # 盤面初期化を待つ
-        init = None
         while True:
-            l = conn.readline() # サーバからの次の行を読み込む
             if not l: raise RuntimeError("Closed before BOARD")
             if l.startswith(Command.BOARD.value):
                 init = l.strip()
                 break
+            l = conn.readline() # サーバからの次の行を読み込む
 
         # 盤面を初期化する
-        field = Field()
+        field = field_cls()
         player.initialize(field, player_id)
         player.handle_message(init)
 
         # メインループ
         while True:
             l = conn.readline()
+            player.stop_ponder() # 相手の手番が終わったので、先読みを止める
             if not l:
                 print("Connection closed")
                 break
@@ -61,9 +73,13 @@ def play_game(host: str, port: int, player: 'Player'):
 
             player.handle_message(msg) # プレイヤーにメッセージを処理させる
 
+            if msg == "waiting":
+                player.start_ponder() # 相手の手番の間に先読みを始める
             if msg == "your turn":
                 mv = player.action() # プレイヤーのアクションを取得
-                print(mv, file=conn)
+                if compact:
+                    mv = compact_move(mv) # "MOVE x y" をマスの番号の形式にする
+                conn.write(f"{mv}\n") # 着手を1回の送信で返す
                 conn.flush()
             if msg.startswith(Command.GAME_OVER.value):
                 print("=== Game Over ===")
@@ -77,6 +93,9 @@ class Player(abc.ABC):
     name() -> str : プレイヤーの名前を返す
     action() -> str : プレイヤーのアクションを返す（着手コマンド）
     handle_message(msg: str) : サーバからのメッセージを処理する
+    visible, gained, lost : 最後に見えた自分の石のマスクと、その前の盤面からの差分 (増えた石, 減った石) のマスク
+    ponder(stop: threading.Event) : 相手の手番の間にバックグラウンドで探索する (ponder_enabled が True のときだけ呼ばれる)
+    reseed(seed: int) : 乱数の種を設定し直す (乱数は self.rng を使うこと)
     """
     def __init__(self):
         self.field: Field = None
@@ -84,6 +103,15 @@ class Player(abc.ABC):
         self.illegal_count: int = 0
         self.opponent_illegal_count: int = 0
         self.last_flip_count: int = 0
+        self.rng = random.Random() # プレイヤーの乱数生成器 (サブクラスで種を指定して作り直してもよい)
+        self.visible: Optional[int] = None # 最後の BOARD で見えた自分の石のマスク (マス (x, y) は y * SIZE + x ビット目)
+        self.gained: int = 0 # 最後の BOARD で増えた自分の石のマスク
+        self.lost: int = 0 # 最後の BOARD で減った (ひっくり返された) 自分の石のマスク
+        self.clock = None # 持ち時間があるときの残り時間 (自分, 相手) (秒)
+        self.time_used = None # 対局の終わりに通知される使った時間 (自分, 相手) (秒)
+        self.ponder_enabled: bool = False # 相手の手番の間に先読みするかどうか
+        self._ponder_thread: threading.Thread = None
+        self._ponder_stop: threading.Event = None
 
     def initialize(self, field: Field, player_id: int):
         '''
@@ -91,6 +119,8 @@ class Player(abc.ABC):
         '''
         self.field = field
         self.player_id = player_id
+        self.visible = None # 次の BOARD ですべてのマスを書き換える
+        self.gained = self.lost = 0
 
     @abc.abstractmethod
     def name(self) -> str:
@@ -104,26 +134,87 @@ class Player(abc.ABC):
         プレイヤーのアクションを返す関数
         """
 
+    def reseed(self, seed: int):
+        '''
+        プレイヤーの乱数の種を設定し直す関数 (run_match で対局を再現するために呼ばれる)
+        self.rng をその場で設定し直すので、rng を共有しているもの (情報集合など) にも効く
+        self.rng 以外の乱数を使うサブクラスはオーバーライドすること
+        '''
+        self.rng.seed(seed)
+
+    def ponder(self, stop: threading.Event):
+        """
+        相手の手番の間にバックグラウンドのスレッドで行う探索 (先読み) の関数
+        stop がセットされたらすぐに戻ること
+        先読みの間、メインのスレッドはサーバからの受信を待つだけなので、プレイヤーの状態は自由に書き換えてよい
+        """
+
+    def start_ponder(self):
+        '''
+        waiting を受け取ったときに呼ばれ、ponder() をバックグラウンドのスレッドで始める関数
+        '''
+        if not self.ponder_enabled or self._ponder_thread is not None:
+            return
+        self._ponder_stop = threading.Event()
+        self._ponder_thread = threading.Thread(target=self.ponder, args=(self._ponder_stop,), daemon=True)
+        self._ponder_thread.start()
+
+    def stop_ponder(self):
+        '''
+        次のメッセージを受け取ったときに呼ばれ、先読みを止めてスレッドの終了を待つ関数
+        '''
+        if self._ponder_thread is None:
+            return
+        self._ponder_stop.set()
+        self._ponder_thread.join()
+        self._ponder_thread = self._ponder_stop = None
+
+    def update_visible(self, mask: int):
+        '''
+        見えた自分の石のマスクで盤面を更新する関数
+        前回のマスクとの差分 (gained, lost) を求め、変わったマスだけを書き換える
+        最初の盤面では、初期配置の相手の石も消すためにすべてのマスを書き換える
+        '''
+        size = Field.SIZE
+        if self.visible is None:
+            changed = (1 << (size * size)) - 1
+            self.gained, self.lost = mask, 0
+        else:
+            changed = self.visible ^ mask
+            self.gained, self.lost = mask & ~self.visible, self.visible & ~mask
+        self.visible = mask
+        while changed:
+            bit = changed & -changed
+            y, x = divmod(bit.bit_length() - 1, size)
+            self.field.set_square(x, y, self.player_id if mask & bit else None)
+            changed ^= bit
+
+    @staticmethod
+    def squares(mask: int) -> Set[Tuple[int, int]]:
+        '''
+        マスクのマスを (x, y) の集合にする関数 (例: player.squares(player.lost))
+        '''
+        size = Field.SIZE
+        return {(i % size, i // size) for i in range(size * size) if mask >> i & 1}
+
     def handle_message(self, msg: str):
         """
         サーバからのメッセージを処理する関数
-        盤面情報と石がいくつひっくり返ったかを更新する
+        盤面情報と石がいくつひっくり返ったか、持ち時間の通知を更新する
         """
         parts = msg.split() # メッセージを空白で分割
         cmd = parts[0] # コマンドを取得
-        if cmd == Command.BOARD.value: # コマンドがBOARDの場合
-            flat = parts[1] # 盤面のフラットな文字列を取得
-            size = Field.SIZE # 盤面のサイズを取得 今回は6
-            for y in range(size):
-                for x in range(size):
-                    self.field.board[y][x] = None # 盤面を空にする
-            for idx,ch in enumerate(flat): # 盤面の文字列を走査
-                if ch == str(self.player_id): # もし、その文字が自分のIDと一致する場合
-                    y,x = divmod(idx,size) # その文字の位置を計算
-                    self.field.board[y][x] = Piece(self.player_id) # その位置に自分の石を置く
+        if cmd == Command.BOARD.value: # コマンドがBOARDの場合 (36文字の形式でも16進数の形式でもよい)
+            self.update_visible(parse_board(msg, self.player_id))
             return
         if cmd == Command.FLIP_COUNT.value:
             self.last_flip_count = int(parts[1])
             return
+        if cmd == Command.CLOCK.value:
+            self.clock = (float(parts[1]), float(parts[2]))
+            return
+        if cmd == Command.TIME_USED.value:
+            self.time_used = (float(parts[1]), float(parts[2]))
+            return
 
         return
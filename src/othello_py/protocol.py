@@ -1,5 +1,9 @@
+import selectors
+import socket
+import time
 from enum import Enum
 from typing import List, Optional
+from .field import OthelloField
 
 class Command(Enum):
     '''
@@ -14,6 +18,12 @@ class Command(Enum):
     ID             = "ID" # プレイヤーIDの通知
     ILLEGAL_COUNT  = "ILLEGAL_COUNT" # 不正手カウンタの通知
     NAME           = "NAME" # プレイヤー名の通知
+    CLOCK          = "CLOCK" # 残り時間の通知 (自分, 相手)
+    TIME_USED      = "TIME_USED" # 対局で使った時間の通知 (自分, 相手)
+    PROTOCOL       = "PROTOCOL" # 通信方式の提案 (サーバ) と選択 (クライアント)
+
+SIZE = OthelloField.SIZE # 盤面のサイズ (6x6)
+PROTOCOLS = ("text", "hex") # サーバが提案する通信方式 (text: 36文字の盤面と "MOVE x y", hex: 16進数のマスクとマスの番号)
 
 class Protocol:
     """
@@ -40,13 +50,117 @@ def serialize_board(board: List[List[Optional[int]]]) -> str:
     )
     return f"{Command.BOARD.value} {flat}"
 
+def serialize_board_mask(mask: int) -> str:
+    """
+    自分の石のマスク (マス (x, y) が y * SIZE + x ビット目) を16進数の盤面の文字列に変換する関数
+    例: 0x180 → "BOARD x180"
+    """
+    return f"{Command.BOARD.value} x{mask:x}"
+
+def parse_board(msg: str, player_id: int) -> int:
+    """
+    盤面の文字列 (36文字の形式と16進数の形式のどちらでもよい) から自分の石のマスクを作る関数
+    """
+    flat = msg.split()[1]
+    if flat.startswith('x'):
+        return int(flat[1:], 16)
+    mine = str(player_id)
+    mask = 0
+    for idx, ch in enumerate(flat):
+        if ch == mine:
+            mask |= 1 << idx
+    return mask
+
 def parse_move(msg: str) -> tuple[int,int]:
     """
     着手コマンドを解析する関数
-    msg: 着手コマンドの文字列 (例: "MOVE 2 3")
+    msg: 着手コマンドの文字列 (例: "MOVE 2 3", またはマスの番号 y * SIZE + x で "MOVE 20")
     戻り値: (x座標, y座標) のタプル
     """
     parts = msg.split()
-    if parts[0] != Command.MOVE.value or len(parts) != 3:
+    if parts[0] != Command.MOVE.value or len(parts) not in (2, 3):
         raise ValueError(f"Invalid MOVE format: {msg!r}")
+    if len(parts) == 2:
+        index = int(parts[1])
+        if not 0 <= index < SIZE * SIZE:
+            raise ValueError(f"Invalid MOVE index: {msg!r}")
+        return index % SIZE, index // SIZE
     return int(parts[1]), int(parts[2]) # x, y 座標を整数に変換して返す
+
+def compact_move(msg: str) -> str:
+    """
+    "MOVE x y" をマスの番号の形式 "MOVE y * SIZE + x" に変換する関数 (それ以外のコマンドはそのまま返す)
+    座標が整数でない、または盤外の手は別のマスに化けないように変換せず、サーバに不正手として扱わせる
+    """
+    parts = msg.split()
+    if len(parts) == 3 and parts[0] == Command.MOVE.value:
+        try:
+            x, y = int(parts[1]), int(parts[2])
+        except ValueError:
+            return msg
+        if 0 <= x < SIZE and 0 <= y < SIZE:
+            return f"{Command.MOVE.value} {y * SIZE + x}"
+    return msg
+
+class LineChannel:
+    """
+    ソケットで1行ずつのメッセージをやり取りするクラス
+    読み込みは自前のバッファで行い、selectors で待つので時間制限つきで読める
+    書き込みはバッファに溜め、flush() で1回の送信にまとめる
+    """
+    def __init__(self, sock: socket.socket):
+        self.sock = sock
+        self.writer = sock.makefile('w', encoding='utf-8', newline='\n')
+        self._buffer = bytearray() # 受信したがまだ行として返していないデータ
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(sock, selectors.EVENT_READ)
+
+    def readline(self, timeout: Optional[float] = None) -> str:
+        '''
+        1行を読み込む関数 (切断されたら空文字列)
+        timeout: 待つ時間の上限 (秒, None なら無制限), 超えたら TimeoutError を送出する
+        '''
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while (end := self._buffer.find(b'\n')) < 0:
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._selector.select(remaining):
+                    raise TimeoutError("readline timed out")
+            chunk = self.sock.recv(4096)
+            if not chunk: # 切断された
+                line = self._buffer.decode('utf-8')
+                self._buffer.clear()
+                return line
+            self._buffer += chunk
+        line = self._buffer[:end + 1].decode('utf-8')
+        del self._buffer[:end + 1]
+        return line
+
+    def write(self, data: str) -> int:
+        '''
+        送信するデータをバッファに溜める関数
+        '''
+        return self.writer.write(data)
+
+    def flush(self):
+        '''
+        バッファに溜めたデータを送信する関数
+        '''
+        self.writer.flush()
+
+    def close(self):
+        '''
+        ファイルオブジェクトとソケットを閉じる関数
+        '''
+        try:
+            self.writer.close()
+        except OSError:
+            pass # 相手が先に切断していた場合は送れなかったデータを捨てる
+        self._selector.close()
+        self.sock.close()
+
+    def __enter__(self) -> 'LineChannel':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,170 @@
+from typing import Callable, List, NamedTuple, Optional, Tuple
+from .bitboard import SIZE, CELLS, FULL, CORNER_MASK, legal_mask, flip_mask, iter_indices
+from .transposition import TranspositionTable, bound_for
+from .zobrist import mask_hash
+
+Move = Tuple[int, int]
+Evaluator = Callable[[int, int], float] # (手番側のマスク, 相手のマスク) -> 手番側から見た評価値
+WIN = 1000 # 終局時の石差1つあたりの評価値 (評価関数の値より十分大きくする)
+INF = float('inf')
+MOVES = tuple((i % SIZE, i // SIZE) for i in range(CELLS)) # マスのインデックスから座標への表
+
+def evaluate(own: int, opp: int) -> int:
+    """
+    既定の評価関数 (手番側から見た値)
+    角の石, 合法手の数, 石の数の差を重み付けして足す
+    """
+    corner = (own & CORNER_MASK).bit_count() - (opp & CORNER_MASK).bit_count()
+    mobility = legal_mask(own, opp).bit_count() - legal_mask(opp, own).bit_count()
+    discs = own.bit_count() - opp.bit_count()
+    return 10 * corner + 2 * mobility + discs
+
+def disc_evaluate(own: int, opp: int) -> int:
+    """
+    石の数の差だけを見る評価関数 (手番側から見た値)
+    """
+    return own.bit_count() - opp.bit_count()
+
+class SearchResult(NamedTuple):
+    """
+    探索の結果
+    move: 最善手 (パスしかなければ None)
+    value: 手番側から見た評価値
+    depth: 探索した深さ
+    nodes: 探索したノードの数
+    """
+    move: Optional[Move]
+    value: float
+    depth: int
+    nodes: int
+
+class NegamaxEngine:
+    """
+    完全情報の盤面を αβ法のネガマックスで探索するクラス
+    盤面は (手番側のマスク, 相手のマスク) のビットボードで扱うので、盤面のコピーを作らない
+    2手目以降は空の窓で調べ、超えたときだけ通常の窓で探索し直す (PVS)
+    着手の順番は 置換表の最善手, キラー手, ヒストリーの値 の順
+    打てる手が無いときはパスとして深さを減らさずに相手へ手番を渡し、両者とも打てなければ終局とする
+    evaluate: 評価関数 (差し替え可能)
+    tt: 置換表
+    search: 反復深化で最善手を探すメソッド
+    search_field: 盤面クラスとプレイヤーIDから探索するメソッド
+    """
+    def __init__(self, evaluate: Evaluator = evaluate, tt_size: int = 1 << 16):
+        """
+        evaluate: 評価関数 (手番側のマスク, 相手のマスク) -> 手番側から見た評価値
+        tt_size: 置換表のエントリ数
+        """
+        self.evaluate = evaluate
+        self.tt = TranspositionTable(tt_size)
+        self.killers: List[List[int]] = [] # 深さ (ply) ごとに、βカットを起こした手を2つまで覚える
+        self.history = [0] * CELLS # マスごとの、βカットを起こした回数の重み
+        self.nodes = 0
+        self._best: Optional[int] = None # ルートでの最善手のマスのインデックス
+        self._root_moves = FULL # ルートで探索する手のマスク
+
+    def search(self, own: int, opp: int, depth: int, moves: Optional[int] = None) -> SearchResult:
+        """
+        深さ1から depth まで反復深化で探索する関数
+        浅い探索の置換表とヒストリーを深い探索の着手の順番に使う
+        own: 手番側のマスク
+        opp: 相手のマスク
+        depth: 最大の探索の深さ
+        moves: ルートで探索する手のマスク (None ならすべての合法手、合法手を1つも含まなければ無視する)
+        """
+        self._root_moves = FULL if moves is None else moves
+        self.nodes = 0
+        self.killers = []
+        self.history = [h >> 1 for h in self.history] # 前の探索の値は半分にして残す
+        value = self.evaluate(own, opp)
+        for d in range(1, depth + 1):
+            self._best = None
+            value = self._negamax(own, opp, d, -INF, INF, 0)
+        move = None if self._best is None else MOVES[self._best]
+        return SearchResult(move, value, depth, self.nodes)
+
+    def search_field(self, field, player_id: int, depth: int, moves: Optional[int] = None) -> SearchResult:
+        """
+        盤面クラスとプレイヤーIDから探索する関数
+        field: board_key() を持つ盤面
+        player_id: 手番のプレイヤー
+        """
+        black, white = field.board_key()
+        if player_id == 0:
+            return self.search(black, white, depth, moves)
+        return self.search(white, black, depth, moves)
+
+    def _order(self, moves: int, tt_move: Optional[Move], ply: int) -> List[int]:
+        """
+        着手を探索する順番に並べる関数
+        """
+        first = -1 if tt_move is None else tt_move[1] * SIZE + tt_move[0]
+        killers = self.killers[ply] if ply < len(self.killers) else ()
+        history = self.history
+        def score(index: int) -> int:
+            if index == first:
+                return 1 << 30
+            if index in killers:
+                return (1 << 29) >> killers.index(index)
+            return history[index]
+        return sorted(iter_indices(moves), key=score, reverse=True)
+
+    def _record_cutoff(self, index: int, depth: int, ply: int):
+        """
+        βカットを起こした手をキラー手とヒストリーに記録する関数
+        """
+        while len(self.killers) <= ply:
+            self.killers.append([])
+        killers = self.killers[ply]
+        if index in killers:
+            killers.remove(index)
+        killers.insert(0, index)
+        del killers[2:]
+        self.history[index] += depth * depth
+
+    def _negamax(self, own: int, opp: int, depth: int, alpha: float, beta: float, ply: int, passed: bool = False) -> float:
+        """
+        ネガマックス探索 (手番側から見た評価値を返す)
+        passed: 直前の手番がパスだったかどうか
+        """
+        self.nodes += 1
+        moves = legal_mask(own, opp)
+        if not moves:
+            if passed: # 両者とも打てないので終局
+                return WIN * (own.bit_count() - opp.bit_count())
+            return -self._negamax(opp, own, depth, -beta, -alpha, ply + 1, True)
+        if depth == 0:
+            return self.evaluate(own, opp)
+        key = mask_hash(own, opp)
+        alpha_start, beta_start = alpha, beta # 置換表で狭める前の探索窓 (保存する値の種類はこの窓で判定する)
+        if ply: # ルートでは最善手が必要なので、置換表で打ち切らない
+            value, alpha, beta = self.tt.cutoff(key, depth, alpha, beta)
+            if value is not None:
+                return value
+        restricted = not ply and (moves & self._root_moves) not in (0, moves) # ルートで手を絞るかどうか
+        if restricted:
+            moves &= self._root_moves
+        entry = self.tt.probe(key)
+        order = self._order(moves, entry.move if entry is not None else None, ply)
+        best, best_index = -INF, order[0]
+        for i, index in enumerate(order):
+            f = flip_mask(own, opp, index)
+            child_own, child_opp = opp & ~f, own | f | (1 << index)
+            if i == 0:
+                v = -self._negamax(child_own, child_opp, depth - 1, -beta, -alpha, ply + 1)
+            else:
+                v = -self._negamax(child_own, child_opp, depth - 1, -alpha - 1, -alpha, ply + 1)
+                if alpha < v < beta: # 空の窓を超えたので、通常の窓で探索し直す
+                    v = -self._negamax(child_own, child_opp, depth - 1, -beta, -alpha, ply + 1)
+            if v > best:
+                best, best_index = v, index
+                if v > alpha:
+                    alpha = v
+                    if alpha >= beta:
+                        self._record_cutoff(index, depth, ply)
+                        break
+        if not restricted: # 絞った手だけの値は、他の探索で使えないので保存しない
+            self.tt.store(key, depth, best, bound_for(best, alpha_start, beta_start), MOVES[best_index])
+        if ply == 0:
+            self._best = best_index
+        return best
@@ -1,47 +1,131 @@
 import socket
 import logging
+import time
+from typing import Generator, List, NamedTuple, Optional, Tuple
 from .field import OthelloField
-from .protocol import Command, serialize_board, parse_move, Protocol
+from .protocol import Command, LineChannel, PROTOCOLS, serialize_board, serialize_board_mask, parse_move, Protocol
 
 MAX_ILLEGAL = 1000 # 不正手の最大カウント
 
-def handle_game(clients, quiet=False):
+class TimeControl(NamedTuple):
+    """
+    チェスクロック方式の持ち時間
+    base: 1人あたりの持ち時間 (秒)
+    increment: 1手ごとに加算する時間 (秒)
+    """
+    base: float
+    increment: float = 0.0
+
+class GameStep(NamedTuple):
+    """
+    ゲームの進行の1ステップ (ソケットは扱わない)
+    out: プレイヤーごとの、送信する行のリスト
+    read: 次に1行を読み込むプレイヤーのID (None ならゲーム終了)
+    timeout: 読み込みを待つ時間の上限 (秒, read のプレイヤーの残り時間, None なら無制限)
+    """
+    out: List[List[str]]
+    read: Optional[int]
+    timeout: Optional[float] = None
+
+Reply = Tuple[str, float] # (読み込んだ行 (切断か時間切れなら空文字列), 待った時間 (秒))
+
+def game_steps(field_cls=OthelloField, time_control: Optional[TimeControl] = None) -> Generator[GameStep, Reply, None]:
     '''
-    ゲームのメインループを処理する関数
-    clients: クライアントのファイルオブジェクトのリスト
-    quiet: Trueならサーバ側のログを抑制する
+    ゲームの規則を、入出力を行わないジェネレータとして実装する関数
+    送信する行と次に読み込むプレイヤーを GameStep で返し、send() で (読み込んだ行, 待った時間) を受け取る
+    同期版のサーバ (handle_game) と asyncio 版のサーバ (handle_game_async) で共通に使う
+    field_cls: 盤面クラス (OthelloField または BitboardField)
+    time_control: 持ち時間 (None なら無制限)
+                  待った時間を手番のプレイヤーの残り時間から引き、0以下になったら (時間切れ) 負けにする
     '''
-    field = OthelloField() # Othelloの盤面を初期化
+    field = field_cls() # Othelloの盤面を初期化
     illegal_counts = [0, 0] # 不正手のカウント
     turn = 0 # ターン数
     passes = [0, 0] # パスのカウント
     names = ["player 0", "player 1"]
+    clocks = None if time_control is None else [float(time_control.base)] * 2 # 残り時間
+    used = [0.0, 0.0] # 使った時間
+    protocols = ["text", "text"] # プレイヤーごとの通信方式 (PROTOCOL で選ばれなければ従来の text)
+
+    def board_line(pid: int) -> str:
+        '''
+        プレイヤーの通信方式で、そのプレイヤーに見える盤面の行を作る関数
+        '''
+        if protocols[pid] == "hex":
+            return serialize_board_mask(field.board_key()[pid])
+        return serialize_board(field.get_visible_board(pid))
+
+    def finish(out: List[List[str]], outcomes: List[str]) -> GameStep:
+        '''
+        使った時間と勝敗を通知する最後のステップを作る関数
+        '''
+        for pid in range(2):
+            out[pid].append(f"{Command.TIME_USED.value} {used[pid]:.3f} {used[1 - pid]:.3f}")
+            out[pid].append(outcomes[pid])
+        return GameStep(out, None)
 
-    # 初期送信：ID, 挨拶, 初期盤面
-    for pid, cl in enumerate(clients): # pidはプレイヤーID, clはクライアントのファイルオブジェクト
-        print(f"{Command.ID.value} {pid}", file=cl) # プレイヤーIDを送信
-        print(Protocol.greeting, file=cl) # 挨拶を送信
-        print(serialize_board(field.get_visible_board(pid)), file=cl) # 初期盤面を送信
-        cl.flush()                          # 送信をフラッシュ
-        line = cl.readline().strip()
+    def flag_fall(pid: int) -> GameStep:
+        '''
+        時間切れのプレイヤーを負けにする最後のステップを作る関数
+        '''
+        logging.info(f"{names[pid]} ran out of time")
+        outcomes = [Protocol.you_win, Protocol.you_win]
+        outcomes[pid] = Protocol.you_lose
+        return finish([[], []], outcomes)
+
+    # 初期送信：ID, 挨拶, 通信方式の提案, 初期盤面
+    # 古いクライアントは提案を読み飛ばして NAME を返し、新しいクライアントは NAME の前に PROTOCOL で方式を選ぶ
+    for pid in range(2): # pidはプレイヤーID
+        out = [[], []]
+        out[pid].append(f"{Command.ID.value} {pid}") # プレイヤーIDを送信
+        out[pid].append(Protocol.greeting) # 挨拶を送信
+        out[pid].append(f"{Command.PROTOCOL.value} {' '.join(PROTOCOLS)}") # 使える通信方式を提案
+        out[pid].append(serialize_board(field.get_visible_board(pid))) # 初期盤面を送信 (方式が決まる前なので text)
+        while True:
+            line, elapsed = yield GameStep(out, pid, None if clocks is None else clocks[pid]) # 送信して名前を受け取る
+            line = line.strip()
+            out = [[], []]
+            used[pid] += elapsed
+            if clocks is not None:
+                clocks[pid] -= elapsed
+                if clocks[pid] <= 0:
+                    step = flag_fall(pid)
+                    for q in range(pid + 1, 2):
+                        step.out[q].clear() # まだ挨拶していないプレイヤーには何も送らない
+                    yield step
+                    return
+            parts = line.split()
+            if len(parts) == 2 and parts[0] == Command.PROTOCOL.value and parts[1] in PROTOCOLS:
+                protocols[pid] = parts[1] # 方式が選ばれたので、続けて NAME を読む
+                continue
+            break
         if line.startswith(Command.NAME.value):
             names[pid] = line.split(None, 1)[1]
 
+    out = [[], []]
     while True:
         curr = turn % 2 # 現在のプレイヤーID（0または1), 2で割った余りを使う
         opp  = 1 - curr # 相手のプレイヤーID（0または1）
-        active, passive = clients[curr], clients[opp] # アクティブなプレイヤーとパッシブなプレイヤーのファイルオブジェクト
-
 
         # ターン通知
-        print("your turn", file=active) # アクティブなプレイヤーにターン通知
-        print("waiting",   file=passive) # パッシブなプレイヤーに待機通知
+        if clocks is not None:
+            out[curr].append(f"{Command.CLOCK.value} {clocks[curr]:.3f} {clocks[opp]:.3f}") # 残り時間を通知
+        out[curr].append("your turn") # アクティブなプレイヤーにターン通知
+        out[opp].append("waiting") # パッシブなプレイヤーに待機通知
 
-        line = active.readline().strip() # アクティブなプレイヤーからの入力を読み込む
+        line, elapsed = yield GameStep(out, curr, None if clocks is None else clocks[curr]) # アクティブなプレイヤーからの入力を読み込む
+        line = line.strip()
+        out = [[], []]
+        used[curr] += elapsed
+        if clocks is not None:
+            clocks[curr] -= elapsed
+            if clocks[curr] <= 0: # 時間切れ
+                yield flag_fall(curr)
+                return
 
         if not line: # 入力が空なら接続が切れたと判断
             logging.error("Client disconnected")
-            break
+            return
 
         if line == Command.PASSED.value: # パスの場合
             passes[curr] += 1 # パスのカウントを増やす
@@ -54,27 +138,31 @@ def handle_game(clients, quiet=False):
             except ValueError:
                 illegal_counts[curr] += 1 # 不正手カウントを増やす
                 if illegal_counts[curr] >= MAX_ILLEGAL:
-                    print(Protocol.you_lose, file=active) # 不正手が最大値に達した場合、負けを通知
-                    print(Protocol.you_win,  file=passive) # 相手には勝ちを通知
+                    outcomes = [Protocol.you_win, Protocol.you_win] # 相手には勝ちを通知
+                    outcomes[curr] = Protocol.you_lose # 不正手が最大値に達した場合、負けを通知
+                    yield finish(out, outcomes)
                     return
                 # 不正手通知
-                print(f"{Command.ILLEGAL_COUNT.value} {illegal_counts[curr]} {illegal_counts[opp]}", file=active)
+                out[curr].append(f"{Command.ILLEGAL_COUNT.value} {illegal_counts[curr]} {illegal_counts[opp]}")
                 # 再打ち盤面を見せる
-                print(serialize_board(field.get_visible_board(curr)), file=active)
+                out[curr].append(board_line(curr))
                 continue
 
+        if clocks is not None:
+            clocks[curr] += time_control.increment # 正常な着手 (パスを含む) ごとに時間を加算
+
         # 正常手レスポンス
-        for cl in clients:
-            print(f"{Command.FLIP_COUNT.value} {flips}", file=cl)
-        print(serialize_board(field.get_visible_board(curr)), file=active)
-        print(serialize_board(field.get_visible_board(opp)),  file=passive)
+        for pid in range(2):
+            out[pid].append(f"{Command.FLIP_COUNT.value} {flips}")
+        out[curr].append(board_line(curr))
+        out[opp].append(board_line(opp))
 
         logging.info(f"---Board after turn {turn} (player {curr})---")
         logging.info(f"{names[0]}: ○, {names[1]}: ●")
         for y in range(field.SIZE):
             row = ''.join(
-                '.' if field.board[y][x] is None
-                else ('○' if field.board[y][x].owner == 0 else '●')
+                '.' if (o := field.owner_at(x, y)) is None
+                else ('○' if o == 0 else '●')
                 for x in range(field.SIZE)
             )
             logging.info(row)
@@ -84,27 +172,60 @@ def handle_game(clients, quiet=False):
         # 終了判定
         no_moves = not field.legal_moves(0) and not field.legal_moves(1) # 両プレイヤーが合法手なしの場合
         if (passes[0] > 1 and passes[1] > 1) or no_moves: # 両プレイヤーが連続でパスした場合、または合法手がない場合
-            counts = [0,0] # 石のカウントを初期化
-            for row in field.board:
-                for p in row:
-                    if p: counts[p.owner]+=1 # 石の所有者ごとにカウント
+            counts = [field.count_pieces(0), field.count_pieces(1)] # 石の所有者ごとにカウント
             diff = counts[0] - counts[1] # 差分を計算
-            for pid, cl in enumerate(clients): # 各プレイヤーに結果を通知
+            outcomes = []
+            for pid in range(2): # 各プレイヤーに結果を通知
                 if diff==0:      outcome = Protocol.draw 
                 elif (diff>0 and pid==0) or (diff<0 and pid==1): outcome = Protocol.you_win
                 else:          outcome = Protocol.you_lose
-                print(outcome, file=cl)
+                outcomes.append(outcome)
+            yield finish(out, outcomes)
             return
 
         turn += 1
 
-def server_main(host: str, port: int, games: int = 1, *, quiet=False):
+def handle_game(clients, quiet=False, field_cls=OthelloField, time_control: Optional[TimeControl] = None):
+    '''
+    ゲームのメインループを処理する関数
+    clients: クライアントのリスト (readline, write, flush を持つ LineChannel など)
+             持ち時間を使う場合は readline(timeout) で時間切れに TimeoutError を送出すること
+    quiet: Trueならサーバ側のログを抑制する
+    field_cls: 盤面クラス (OthelloField または BitboardField)
+    time_control: 持ち時間 (None なら無制限)
+    '''
+    steps = game_steps(field_cls, time_control)
+    step = next(steps)
+    while True:
+        for cl, lines in zip(clients, step.out): # 各プレイヤーへ、溜めた行をまとめて1回で送信する
+            if lines:
+                cl.write(''.join(f"{line}\n" for line in lines))
+                cl.flush()
+        if step.read is None:
+            return
+        start = time.monotonic()
+        try:
+            if step.timeout is None:
+                line = clients[step.read].readline() # プレイヤーからの入力を読み込む
+            else:
+                line = clients[step.read].readline(step.timeout) # 残り時間だけ待つ
+        except TimeoutError:
+            line = "" # 時間切れ (待った時間が残り時間を超えるので負けになる)
+        try:
+            step = steps.send((line, time.monotonic() - start))
+        except StopIteration:
+            return
+
+def server_main(host: str, port: int, games: int = 1, *, quiet=False, field_cls=OthelloField,
+                time_control: Optional[TimeControl] = None):
     """
     Othelloサーバーのメイン関数
     host: ホスト名またはIPアドレス
     port: ポート番号 (デフォルトでは8000)
     games: ゲームの回数（デフォルトは1）
     quiet: Trueならサーバ側のログを抑制する
+    field_cls: 盤面クラス (OthelloField または BitboardField)
+    time_control: 持ち時間 (None なら無制限)
     """
     with socket.create_server((host, port)) as srv: # サーバーソケットを作成
         for _ in range(games):
@@ -112,9 +233,9 @@ def server_main(host: str, port: int, games: int = 1, *, quiet=False):
             clients = []
             for i in range(2):
                 conn, addr = srv.accept() # クライアントからの接続を待つ
-                cl = conn.makefile(mode='rw', buffering=1, encoding='utf-8')
+                cl = LineChannel(conn)
                 logging.info(f"Player {i+1} connected from {addr}")
                 clients.append(cl)
-            handle_game(clients, quiet=quiet)  
+            handle_game(clients, quiet=quiet, field_cls=field_cls, time_control=time_control)
             for cl in clients: 
                 cl.close()
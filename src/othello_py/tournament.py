@@ -0,0 +1,191 @@
+import contextlib
+import json
+import math
+import os
+from concurrent.futures import as_completed
+from typing import Callable, List, NamedTuple, Optional, Sequence, Tuple
+from .match import MatchResult, run_match
+from .parallel import ParallelSearch
+from .player_base import Player
+from .server import TimeControl
+
+Factory = Callable[[], Player] # プレイヤーを作る関数 (プロセスプールで使うので pickle できること)
+Entrant = Tuple[str, Factory] # (参加者の名前, プレイヤーを作る関数)
+Z95 = 1.96 # 95% 信頼区間に使う標準正規分布の値
+
+class GameTask(NamedTuple):
+    """
+    1局分の予定
+    game: 対局の番号
+    black, white: 黒 (先手) と白 (後手) の参加者の番号
+    seed: 対局の乱数の種 (run_match に渡すので、同じ種で同じ対局を再現できる)
+    """
+    game: int
+    black: int
+    white: int
+    seed: int
+
+def _pairings(pairs: List[Tuple[int, int]], games: int) -> List[Tuple[int, int]]:
+    '''
+    参加者の組ごとに games 局を、先手と後手を交互に入れ替えて並べる関数
+    '''
+    return [(i, j) if g % 2 == 0 else (j, i) for i, j in pairs for g in range(games)]
+
+def round_robin(n: int, games: int = 2) -> List[Tuple[int, int]]:
+    '''
+    総当たりの組み合わせ (黒, 白) を返す関数
+    n: 参加者の数
+    games: 1組あたりの対局数 (偶数なら先手と後手が同じ数になる)
+    '''
+    return _pairings([(i, j) for i in range(n) for j in range(i + 1, n)], games)
+
+def gauntlet(n: int, games: int = 2, challenger: int = 0) -> List[Tuple[int, int]]:
+    '''
+    1人の挑戦者と残りの全員との組み合わせ (黒, 白) を返す関数
+    challenger: 挑戦者の番号
+    '''
+    return _pairings([(challenger, j) for j in range(n) if j != challenger], games)
+
+def elo_from_score(score: float) -> float:
+    '''
+    平均得点 (勝ち=1, 引き分け=0.5, 負け=0) を相手との Elo レーティングの差に変換する関数
+    全勝や全敗のときは無限大になるので、±800 で打ち切る
+    '''
+    if score <= 0.0:
+        return -800.0
+    if score >= 1.0:
+        return 800.0
+    return max(-800.0, min(800.0, 400.0 * math.log10(score / (1.0 - score))))
+
+class Standings:
+    """
+    参加者ごとの成績を集計するクラス
+    add: 1局の結果を加えるメソッド
+    table: 成績表 (得点率と Elo の差、それぞれの 95% 信頼区間) を文字列で返すメソッド
+    """
+    def __init__(self, names: Sequence[str]):
+        self.names = list(names)
+        n = len(self.names)
+        self.wins = [0] * n
+        self.draws = [0] * n
+        self.losses = [0] * n
+        self.unfinished = 0 # 決着がつかなかった対局の数 (切断など, 得点には数えない)
+
+    def add(self, black: int, white: int, result: MatchResult):
+        '''
+        1局の結果を加える関数
+        '''
+        if result.winner is not None:
+            winner, loser = (black, white) if result.winner == 0 else (white, black)
+            self.wins[winner] += 1
+            self.losses[loser] += 1
+        elif result.outcomes[0] is not None and result.outcomes[0] == result.outcomes[1]:
+            self.draws[black] += 1
+            self.draws[white] += 1
+        else:
+            self.unfinished += 1
+
+    def score(self, i: int) -> Tuple[float, float, float]:
+        '''
+        参加者 i の平均得点と、その 95% 信頼区間 (下限, 上限) を返す関数 (正規近似)
+        '''
+        n = self.wins[i] + self.draws[i] + self.losses[i]
+        if n == 0:
+            return 0.5, 0.0, 1.0
+        mean = (self.wins[i] + 0.5 * self.draws[i]) / n
+        var = (self.wins[i] * (1.0 - mean) ** 2 + self.draws[i] * (0.5 - mean) ** 2 + self.losses[i] * mean ** 2) / n
+        margin = Z95 * math.sqrt(var / n)
+        return mean, max(0.0, mean - margin), min(1.0, mean + margin)
+
+    def table(self) -> str:
+        '''
+        得点の高い順に並べた成績表を返す関数
+        Elo は対戦した相手全体との差で、信頼区間は得点の信頼区間を変換したもの
+        '''
+        rows = [f"{'name':<20} {'games':>5} {'W':>5} {'D':>5} {'L':>5} {'score':>6} {'95% CI':>13} {'elo':>5} {'95% CI':>11}"]
+        order = sorted(range(len(self.names)), key=lambda i: self.score(i)[0], reverse=True)
+        for i in order:
+            mean, low, high = self.score(i)
+            n = self.wins[i] + self.draws[i] + self.losses[i]
+            rows.append(
+                f"{self.names[i]:<20} {n:>5} {self.wins[i]:>5} {self.draws[i]:>5} {self.losses[i]:>5} "
+                f"{mean:>6.3f} [{low:.3f},{high:.3f}] {elo_from_score(mean):>+5.0f} "
+                f"[{elo_from_score(low):+.0f},{elo_from_score(high):+.0f}]"
+            )
+        return '\n'.join(rows)
+
+def play_task(task: GameTask, black: Factory, white: Factory,
+              time_control: Optional[TimeControl] = None) -> Tuple[GameTask, MatchResult]:
+    '''
+    1局を対局する関数 (ワーカープロセスで実行する)
+    プレイヤーの表示は捨てる
+    '''
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        result = run_match(black(), white(), task.seed, time_control=time_control)
+    return task, result
+
+def run_tournament(entrants: Sequence[Entrant], schedule: str = 'round-robin', games: int = 2, *,
+                   workers: Optional[int] = 0, out_path: Optional[str] = None, seed: int = 0,
+                   report_every: int = 10, time_control: Optional[TimeControl] = None) -> Standings:
+    '''
+    参加者の総当たり戦 (round-robin) または挑戦者と残り全員の対戦 (gauntlet, 挑戦者は最初の参加者) を行う関数
+    対局はプロセスプールで並列に行い、終わった順に結果を JSONL のファイルへ1行ずつ書き出す
+    entrants: (名前, プレイヤーを作る関数) のリスト (関数はモジュールの関数や functools.partial など pickle できるもの)
+    schedule: 'round-robin' または 'gauntlet'
+    games: 1組あたりの対局数 (先手と後手を交互に入れ替える)
+    workers: ワーカープロセスの数 (0 なら並列化しない, None なら CPU のコア数)
+    out_path: 結果を追記する JSONL ファイルのパス (None なら書き出さない)
+    seed: 最初の対局の乱数の種 (i 局目は seed + i)
+          記録した対局は run_match(黒を作る関数(), 白を作る関数(), 記録の seed) で再現できる
+          (持ち時間や時間制限つきの探索を使う場合は、時間に依存するので再現できないことがある)
+    report_every: この局数ごとに成績表を表示する (0 なら最後だけ)
+    time_control: 持ち時間 (None なら無制限)
+    戻り値: 最終的な成績
+    '''
+    names = [name for name, _ in entrants]
+    factories = [factory for _, factory in entrants]
+    if schedule == 'round-robin':
+        pairs = round_robin(len(entrants), games)
+    elif schedule == 'gauntlet':
+        pairs = gauntlet(len(entrants), games)
+    else:
+        raise ValueError(f"Unknown schedule: {schedule!r}")
+    tasks = [GameTask(g, b, w, seed + g) for g, (b, w) in enumerate(pairs)]
+    standings = Standings(names)
+    out = open(out_path, 'a', encoding='utf-8') if out_path is not None else None
+    done = 0 # 終わった対局の数
+
+    def record(task: GameTask, result: MatchResult):
+        nonlocal done
+        done += 1
+        standings.add(task.black, task.white, result)
+        if out is not None:
+            out.write(json.dumps({
+                'game': task.game, 'seed': task.seed,
+                'black': names[task.black], 'white': names[task.white],
+                'winner': None if result.winner is None else names[(task.black, task.white)[result.winner]],
+                'outcomes': result.outcomes, 'discs': result.discs, 'time_used': result.time_used,
+            }) + '\n')
+            out.flush() # 途中で止めても終わった対局の結果が残るようにする
+        if report_every and done % report_every == 0 and done < len(tasks):
+            print(f"--- {done}/{len(tasks)} games ---")
+            print(standings.table())
+
+    try:
+        if workers == 0:
+            for task in tasks:
+                record(*play_task(task, factories[task.black], factories[task.white], time_control))
+        else:
+            with ParallelSearch(workers) as pool:
+                futures = [
+                    pool.executor.submit(play_task, task, factories[task.black], factories[task.white], time_control)
+                    for task in tasks
+                ]
+                for future in as_completed(futures):
+                    record(*future.result())
+    finally:
+        if out is not None:
+            out.close()
+    print(f"=== {done} games ===")
+    print(standings.table())
+    return standings
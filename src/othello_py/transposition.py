@@ -0,0 +1,112 @@
+from enum import Enum
+from typing import List, NamedTuple, Optional, Tuple
+
+class Bound(Enum):
+    '''
+    置換表に保存する評価値の種類
+    EXACT: 正確な値, LOWER: 下界 (実際の値はこれ以上), UPPER: 上界 (実際の値はこれ以下)
+    '''
+    EXACT = 0
+    LOWER = 1
+    UPPER = 2
+
+class TTEntry(NamedTuple):
+    """
+    置換表のエントリ
+    key: 局面のキー
+    depth: 残り探索深さ
+    value: 評価値
+    bound: 評価値の種類
+    move: 最善手 (なければ None)
+    """
+    key: int
+    depth: int
+    value: float
+    bound: Bound
+    move: Optional[Tuple[int, int]]
+
+class TranspositionTable:
+    """
+    置換表のクラス
+    エントリ数を固定したハッシュ表で、使用メモリは作成時に決まる
+    同じスロットが衝突した場合は、より深く探索したエントリを優先して残す
+    size: スロット数 (2のべき乗に切り上げる)
+    probe: キーに対応するエントリを取得するメソッド
+    store: エントリを保存するメソッド
+    cutoff: 保存済みの値で探索を打ち切れるか判定するメソッド
+    """
+
+    def __init__(self, size: int = 1 << 16):
+        """
+        置換表の初期化を行う
+        """
+        n = 1
+        while n < size:
+            n <<= 1
+        self.mask = n - 1
+        self.slots: List[Optional[TTEntry]] = [None] * n
+        self.hits = 0 # probe が成功した回数
+        self.stores = 0 # store が書き込んだ回数
+
+    def __len__(self) -> int:
+        return len(self.slots)
+
+    def clear(self):
+        """
+        すべてのエントリを消去する
+        """
+        self.slots = [None] * len(self.slots)
+        self.hits = self.stores = 0
+
+    def probe(self, key: int) -> Optional[TTEntry]:
+        """
+        キーに対応するエントリを返す (なければ None)
+        """
+        entry = self.slots[key & self.mask]
+        if entry is not None and entry.key == key:
+            self.hits += 1
+            return entry
+        return None
+
+    def store(self, key: int, depth: int, value: float, bound: Bound, move: Optional[Tuple[int, int]] = None):
+        """
+        エントリを保存する
+        既存のエントリが別の局面でより深く探索されている場合は上書きしない (深さ優先の置換)
+        """
+        index = key & self.mask
+        old = self.slots[index]
+        if old is not None and old.key != key and old.depth > depth:
+            return
+        if old is not None and old.key == key and move is None:
+            move = old.move # 最善手が分からない場合は以前の手を残す
+        self.slots[index] = TTEntry(key, depth, value, bound, move)
+        self.stores += 1
+
+    def cutoff(self, key: int, depth: int, alpha: float, beta: float) -> Tuple[Optional[float], float, float]:
+        """
+        保存済みの値で探索を打ち切れるか判定する
+        戻り値: (打ち切れる場合の評価値 または None, 更新後の alpha, 更新後の beta)
+        """
+        entry = self.probe(key)
+        if entry is None or entry.depth < depth:
+            return None, alpha, beta
+        if entry.bound is Bound.EXACT:
+            return entry.value, alpha, beta
+        if entry.bound is Bound.LOWER:
+            alpha = max(alpha, entry.value)
+        else:
+            beta = min(beta, entry.value)
+        if alpha >= beta:
+            return entry.value, alpha, beta
+        return None, alpha, beta
+
+def bound_for(value: float, alpha: float, beta: float) -> Bound:
+    """
+    探索窓 (alpha, beta) で得た評価値の種類を判定する関数
+    alpha, beta には、cutoff() で狭める前の元の探索窓を渡すこと
+    """
+    if value <= alpha:
+        return Bound.UPPER
+    if value >= beta:
+        return Bound.LOWER
+    return Bound.EXACT
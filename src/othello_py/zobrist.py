@@ -0,0 +1,34 @@
+import random
+from typing import List, Tuple
+
+SEED = 20250731 # 乱数の種 (プロセス間で同じキーになるように固定する)
+MASK64 = (1 << 64) - 1 # 64ビットに収めるためのマスク
+
+def make_keys(cells: int, seed: int = SEED) -> List[Tuple[int, int]]:
+    """
+    Zobristハッシュ用の乱数表を作る関数
+    cells: マスの数
+    戻り値: マスごとの (黒の乱数, 白の乱数) のリスト
+    """
+    rng = random.Random(seed)
+    return [(rng.getrandbits(64), rng.getrandbits(64)) for _ in range(cells)]
+
+_rng = random.Random(SEED + 1)
+SIDE_KEYS = (_rng.getrandbits(64), _rng.getrandbits(64)) # 手番 (0=黒, 1=白) ごとの乱数
+PLY_KEYS = tuple(_rng.getrandbits(64) for _ in range(128)) # 手数ごとの乱数 (手数で評価が変わる探索向け)
+
+def node_key(key: int, player_id: int, turn: int = 0) -> int:
+    """
+    盤面のキーに手番と手数を混ぜて、探索ノードのキーを作る関数
+    """
+    return key ^ SIDE_KEYS[player_id] ^ PLY_KEYS[turn % len(PLY_KEYS)]
+
+def mask_hash(black: int, white: int, side: int = 0) -> int:
+    """
+    (黒のマスク, 白のマスク, 手番) から64ビットのハッシュ値を作る関数 (splitmix64 の混合関数)
+    Zobristキーを持たないビットマスクだけの盤面 (定石ファイル, ネガマックス探索) で使う
+    """
+    h = (black * 0x9E3779B97F4A7C15 ^ white * 0xC2B2AE3D27D4EB4F ^ side) & MASK64
+    h = ((h ^ (h >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    h = ((h ^ (h >> 27)) * 0x94D049BB133111EB) & MASK64
+    return h ^ (h >> 31)
@@ -0,0 +1,21 @@
+# othello_pyファイルからのインポートを行うための設定
+import sys, os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import contextlib, io
+import pytest
+from othello_py import ISMCTSPlayer, run_match
+
+@pytest.mark.parametrize("seed", [1, 7])
+def test_capped_info_set_recovers_from_illegal_moves(seed):
+    """
+    世界の数に上限があると本当の世界が間引かれ、不正手とされた手が残りの世界すべてで打てることがある
+    そのときは情報集合を作り直すので、同じ不正手を繰り返して反則負けにならないこと
+    """
+    players = [ISMCTSPlayer(iterations=60, max_worlds=3), ISMCTSPlayer(iterations=60, max_worlds=3)]
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = run_match(players[0], players[1], seed)
+    assert all(outcome is not None for outcome in result.outcomes)
+    assert sum(result.discs) > 4 # 不正手だけで終わらずに対局が進んでいる
+    for player in players:
+        assert player.illegal_count < 100 # 修正前は MAX_ILLEGAL (1000) に達して反則負けになっていた